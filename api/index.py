@@ -1,7 +1,7 @@
 import sys
 import os
 from starlette.applications import Starlette
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, Response
 from starlette.routing import Route
 from starlette.middleware import Middleware
 from starlette.middleware.cors import CORSMiddleware
@@ -10,11 +10,10 @@ from starlette.middleware.trustedhost import TrustedHostMiddleware
 # Adiciona o diretório raiz ao PATH do Python
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from calculadora_aposentadoria import app
+import metricas
 
-# Configuração para o Vercel
-if __name__ == "__main__":
-    app.run()
+# Esta API não importa a interface (Streamlit, Matplotlib), então o cold start
+# no Vercel carrega só o Starlette
 
 async def homepage(request):
     return JSONResponse({
@@ -28,14 +27,19 @@ async def health_check(request):
         "status": "healthy"
     })
 
+async def exportar_metricas(request):
+    return Response(metricas.registro.exportar(), media_type=metricas.TIPO_PROMETHEUS)
+
 # Definição das rotas
 routes = [
     Route("/", endpoint=homepage),
-    Route("/health", endpoint=health_check)
+    Route("/health", endpoint=health_check),
+    Route("/metrics", endpoint=exportar_metricas)
 ]
 
 # Configuração de middleware com restrições de segurança
 middleware = [
+    Middleware(metricas.MiddlewareMetricas),
     Middleware(
         TrustedHostMiddleware, 
         allowed_hosts=['vercel.app', 'localhost', '127.0.0.1']
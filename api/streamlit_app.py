@@ -4,8 +4,8 @@ import os
 # Adiciona o diretório raiz ao PATH do Python
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# Importa e executa a aplicação diretamente
+# Importar o módulo não monta a interface; o Streamlit executa este arquivo como __main__
 import calculadora_aposentadoria
 
 if __name__ == "__main__":
-    calculadora_aposentadoria.app.run() 
\ No newline at end of file
+    calculadora_aposentadoria.main()
@@ -0,0 +1,131 @@
+import csv
+import os
+from functools import lru_cache
+
+import numpy as np
+
+# Arquivo padrão com a série histórica de retornos mensais
+CAMINHO_SERIE = os.environ.get(
+    "SERIE_HISTORICA_CSV",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "dados", "retornos_mensais.csv")
+)
+
+# Coluna de inflação usada para deflacionar os retornos em termos reais
+COLUNA_INFLACAO = "ipca"
+
+# Amplitude máxima (em log) dos índices acumulados para usar as somas prefixadas.
+# E[s + n] - E[s] perde cerca de exp(amplitude) ulps; com séries nominais de
+# hiperinflação a amplitude passa de 30 e o saldo é calculado mês a mês
+AMPLITUDE_MAXIMA_PREFIXOS = 12.0
+
+class SerieHistorica:
+    """Retornos mensais históricos carregados uma única vez em arrays contíguos
+
+    O CSV tem uma coluna "data" (AAAA-MM) seguida de uma coluna por ativo
+    com o retorno do mês em forma decimal (0.0123 = 1,23%), por exemplo:
+
+        data,ibovespa,cdi,ipca
+        2000-01,-0.0410,0.0146,0.0062
+    """
+
+    def __init__(self, datas, retornos: dict):
+        self.datas = list(datas)
+        self.retornos = {nome: np.ascontiguousarray(valores, dtype=np.float64) for nome, valores in retornos.items()}
+
+    @property
+    def ativos(self):
+        return [nome for nome in self.retornos if nome != COLUNA_INFLACAO]
+
+    def log_retornos(self, carteira: dict, real: bool = False):
+        """Log-retornos mensais de uma carteira rebalanceada todo mês
+
+        carteira associa cada ativo ao seu peso; os pesos devem somar 1.
+        Com real=True os retornos são deflacionados pela coluna de inflação.
+        """
+        for ativo in carteira:
+            if ativo not in self.retornos:
+                raise ValueError(f"Ativo desconhecido na série histórica: {ativo}")
+        if not np.isclose(sum(carteira.values()), 1.0):
+            raise ValueError("Os pesos da carteira devem somar 1")
+
+        retorno = sum(peso * self.retornos[ativo] for ativo, peso in carteira.items())
+        log_retornos = np.log1p(retorno)
+        if real:
+            if COLUNA_INFLACAO not in self.retornos:
+                raise ValueError(f"A série histórica não tem a coluna {COLUNA_INFLACAO}")
+            log_retornos = log_retornos - np.log1p(self.retornos[COLUNA_INFLACAO])
+        return log_retornos
+
+@lru_cache(maxsize=4)
+def _carregar(caminho: str, modificado_em: float) -> SerieHistorica:
+    with open(caminho, newline="", encoding="utf-8") as arquivo:
+        leitor = csv.reader(arquivo)
+        cabecalho = [coluna.strip().lower() for coluna in next(leitor)]
+        linhas = [linha for linha in leitor if linha]
+
+    if not cabecalho or cabecalho[0] != "data":
+        raise ValueError("A primeira coluna da série histórica deve ser 'data'")
+    valores = np.array([[float(valor) for valor in linha[1:]] for linha in linhas], dtype=np.float64)
+    valores = valores.reshape(len(linhas), len(cabecalho) - 1)
+    return SerieHistorica(
+        [linha[0] for linha in linhas],
+        {nome: valores[:, coluna] for coluna, nome in enumerate(cabecalho[1:])}
+    )
+
+def carregar_serie(caminho: str = CAMINHO_SERIE) -> SerieHistorica:
+    """Carrega a série histórica, reaproveitando a leitura enquanto o arquivo não muda"""
+    return _carregar(caminho, os.path.getmtime(caminho))
+
+def indices_prefixados(log_retornos):
+    """Índices acumulados que tornam cada janela uma consulta O(1)
+
+    P[k] é a soma dos log-retornos dos k primeiros meses, então o fator de
+    crescimento da janela [s, s + n) é exp(P[s + n] - P[s]). E[k] acumula
+    exp(-P[j]) para j = 1..k, de modo que o saldo de aportes mensais no fim
+    da janela é aporte * exp(P[s + n]) * (E[s + n] - E[s]).
+    """
+    prefixo = np.concatenate(([0.0], np.cumsum(log_retornos)))
+    descontos = np.concatenate(([0.0], np.cumsum(np.exp(-prefixo[1:]))))
+    return prefixo, descontos
+
+def saldos_janelas(log_retornos, aporte_mensal: float, meses: int):
+    """Saldo de aportes mensais no fim de cada janela de `meses` meses da série
+
+    Com os índices acumulados cada janela é uma consulta O(1), mas a
+    diferença E[s + n] - E[s] cancela quando o log acumulado varia muitas
+    ordens de grandeza (séries nominais com hiperinflação). Nesse caso o
+    saldo é calculado mês a mês, com um vetor sobre todas as janelas.
+    """
+    janelas = len(log_retornos) - meses + 1
+    prefixo, descontos = indices_prefixados(log_retornos)
+    inicios = np.arange(janelas)
+    fins = inicios + meses
+    if np.ptp(prefixo) <= AMPLITUDE_MAXIMA_PREFIXOS:
+        return aporte_mensal * np.exp(prefixo[fins]) * (descontos[fins] - descontos[inicios])
+
+    crescimentos = np.exp(log_retornos)
+    saldos = np.zeros(janelas)
+    for mes in range(meses):
+        saldos = saldos * crescimentos[mes:mes + janelas] + aporte_mensal
+    return saldos
+
+def backtest(serie: SerieHistorica, aporte_mensal: float, anos: int, taxa_retirada: float,
+             carteira: dict, real: bool = False):
+    """Avalia o plano começando em cada mês da série, todas as janelas de uma vez"""
+    meses = anos * 12
+    log_retornos = serie.log_retornos(carteira, real)
+    janelas = len(log_retornos) - meses + 1
+    if janelas <= 0:
+        raise ValueError(f"A série histórica tem apenas {len(log_retornos)} meses, menos que o horizonte de {meses}")
+
+    prefixo = np.concatenate(([0.0], np.cumsum(log_retornos)))
+    valor_final = saldos_janelas(log_retornos, aporte_mensal, meses)
+    fator_crescimento = np.exp(prefixo[meses:] - prefixo[:janelas])
+
+    return {
+        "datas_inicio": serie.datas[:janelas],
+        "valor_final": valor_final,
+        "saque_mensal": valor_final * taxa_retirada / 12,
+        "fator_crescimento": fator_crescimento,
+        "total_investido": aporte_mensal * meses,
+    }
@@ -0,0 +1,254 @@
+"""Teste de carga local das APIs FastAPI (index.py) e Starlette (api/index.py)
+
+Vários clientes httpx assíncronos disparam requisições concorrentes segundo
+uma mistura de cenários, por um tempo fixo, e o relatório traz vazão e
+latências p50/p95/p99 por cenário em JSON. Não depende de serviços
+externos: por padrão a aplicação roda no próprio processo (ASGITransport,
+sem rede); com --uvicorn, ela sobe num uvicorn local e o tráfego passa
+pelo HTTP de verdade.
+
+Cenários da API FastAPI:
+- padrao: POST /calcular com os valores iniciais do formulário
+- sliders: GET /calcular com valores sorteados na grade dos sliders
+- lote: POST /calcular/lote com 1.000 cenários sorteados
+- monte_carlo: POST /calcular/monte-carlo com 10.000 caminhos
+Cenários da API Starlette: raiz (GET /) e health (GET /health).
+
+Uso: python benchmarks/carga.py [--app fastapi|starlette] [--mix padrao=5,sliders=3]
+     [--concorrencia 16] [--duracao 10] [--uvicorn] [--saida relatorio.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+# Adiciona o diretório raiz ao PATH do Python
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(RAIZ)
+
+APLICACOES = {
+    "fastapi": "index:app",
+    "starlette": "api.index:app",
+}
+
+MISTURAS_PADRAO = {
+    "fastapi": "padrao=4,sliders=4,lote=1,monte_carlo=1",
+    "starlette": "raiz=1,health=4",
+}
+
+def requisicao_padrao(sorteio):
+    return "POST", "/calcular", {"json": {
+        "aporte_mensal": 2000.0, "anos": 25, "taxa_retorno": 0.10, "taxa_retirada": 0.04,
+        "resolucao": "anual",
+    }}
+
+def requisicao_sliders(sorteio):
+    return "GET", "/calcular", {"params": {
+        "aporte_mensal": sorteio.randrange(0, 20001, 100),
+        "anos": sorteio.randint(1, 50),
+        "taxa_retorno": sorteio.randint(10, 200) / 1000,
+        "taxa_retirada": sorteio.randint(10, 100) / 1000,
+        "resolucao": "anual",
+    }}
+
+def requisicao_lote(sorteio, cenarios: int = 1000):
+    return "POST", "/calcular/lote", {"json": {
+        "aporte_mensal": [sorteio.uniform(0, 20000) for _ in range(cenarios)],
+        "anos": [sorteio.randint(1, 50) for _ in range(cenarios)],
+        "taxa_retorno": [sorteio.uniform(0.01, 0.20) for _ in range(cenarios)],
+        "taxa_retirada": [sorteio.uniform(0.01, 0.10) for _ in range(cenarios)],
+    }}
+
+def requisicao_monte_carlo(sorteio):
+    return "POST", "/calcular/monte-carlo", {"json": {
+        "aporte_mensal": 2000.0, "anos": 25, "taxa_retorno": 0.10, "taxa_retirada": 0.04,
+        "caminhos": 10000, "semente": sorteio.randrange(2**32),
+    }}
+
+CENARIOS = {
+    "padrao": requisicao_padrao,
+    "sliders": requisicao_sliders,
+    "lote": requisicao_lote,
+    "monte_carlo": requisicao_monte_carlo,
+    "raiz": lambda sorteio: ("GET", "/", {}),
+    "health": lambda sorteio: ("GET", "/health", {}),
+}
+
+def ler_mistura(texto: str) -> dict:
+    """'padrao=4,lote=1' -> {'padrao': 4.0, 'lote': 1.0}"""
+    mistura = {}
+    for parte in texto.split(","):
+        nome, _, peso = parte.partition("=")
+        if nome not in CENARIOS:
+            raise SystemExit(f"Cenário desconhecido: {nome} (disponíveis: {', '.join(CENARIOS)})")
+        mistura[nome] = float(peso or 1)
+    return mistura
+
+def percentil(valores, p: float) -> float:
+    """Percentil com interpolação linear, como numpy.percentile"""
+    ordenados = sorted(valores)
+    posicao = (len(ordenados) - 1) * p / 100
+    inferior = int(posicao)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (posicao - inferior)
+
+def resumir(latencias, status, duracao: float) -> dict:
+    resumo = {
+        "requisicoes": len(latencias),
+        "erros": sum(quantidade for codigo, quantidade in status.items() if not (codigo.isdigit() and 200 <= int(codigo) < 400)),
+        "status": dict(sorted(status.items())),
+        "vazao_rps": len(latencias) / duracao,
+    }
+    if latencias:
+        resumo.update({
+            "media_ms": statistics.fmean(latencias) * 1e3,
+            "p50_ms": percentil(latencias, 50) * 1e3,
+            "p95_ms": percentil(latencias, 95) * 1e3,
+            "p99_ms": percentil(latencias, 99) * 1e3,
+            "max_ms": max(latencias) * 1e3,
+        })
+    return resumo
+
+async def executar(cliente: httpx.AsyncClient, mistura: dict, concorrencia: int, duracao: float,
+                   aquecimento: int, semente: int) -> dict:
+    """Roda os clientes até acabar o tempo e devolve o relatório por cenário e total"""
+    nomes, pesos = list(mistura), list(mistura.values())
+    latencias = {nome: [] for nome in nomes}
+    status = {nome: {} for nome in nomes}
+
+    async def cliente_virtual(indice: int, fim: float, registrar: bool):
+        sorteio = random.Random(semente + indice)
+        while time.perf_counter() < fim:
+            nome = sorteio.choices(nomes, pesos)[0]
+            metodo, caminho, opcoes = CENARIOS[nome](sorteio)
+            inicio = time.perf_counter()
+            try:
+                resposta = await cliente.request(metodo, caminho, **opcoes)
+                await resposta.aread()
+                codigo = str(resposta.status_code)
+            except httpx.HTTPError as e:
+                codigo = type(e).__name__
+            if registrar:
+                latencias[nome].append(time.perf_counter() - inicio)
+                status[nome][codigo] = status[nome].get(codigo, 0) + 1
+
+    # Aquecimento de meio segundo, fora do relatório, para carregar módulos, caches e pools
+    if aquecimento:
+        await asyncio.gather(*(cliente_virtual(-1 - i, time.perf_counter() + 0.5, False) for i in range(aquecimento)))
+
+    inicio = time.perf_counter()
+    fim = inicio + duracao
+    await asyncio.gather(*(cliente_virtual(i, fim, True) for i in range(concorrencia)))
+    decorrido = time.perf_counter() - inicio
+
+    todas = [latencia for valores in latencias.values() for latencia in valores]
+    status_total = {}
+    for contagem in status.values():
+        for codigo, quantidade in contagem.items():
+            status_total[codigo] = status_total.get(codigo, 0) + quantidade
+    return {
+        "duracao_s": decorrido,
+        "total": resumir(todas, status_total, decorrido),
+        "cenarios": {nome: resumir(latencias[nome], status[nome], decorrido) for nome in nomes},
+    }
+
+def porta_livre() -> int:
+    with socket.socket() as conexao:
+        conexao.bind(("127.0.0.1", 0))
+        return conexao.getsockname()[1]
+
+async def esperar_servidor(url: str, caminho: str, processo, limite: float = 30.0):
+    inicio = time.perf_counter()
+    async with httpx.AsyncClient(base_url=url) as cliente:
+        while time.perf_counter() - inicio < limite:
+            if processo.poll() is not None:
+                raise SystemExit("O uvicorn terminou antes de aceitar conexões")
+            try:
+                await cliente.get(caminho)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+    raise SystemExit("O uvicorn não respondeu a tempo")
+
+async def principal(args) -> dict:
+    mistura = ler_mistura(args.mix or MISTURAS_PADRAO[args.app])
+    limites = httpx.Limits(max_connections=args.concorrencia, max_keepalive_connections=args.concorrencia)
+    contexto = {
+        "app": args.app,
+        "modo": "uvicorn" if args.uvicorn else "asgi",
+        "mistura": mistura,
+        "concorrencia": args.concorrencia,
+        "workers": args.workers if args.uvicorn else None,
+        "python": sys.version.split()[0],
+        "cpus": os.cpu_count(),
+        "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+    if not args.uvicorn:
+        modulo, _, nome = APLICACOES[args.app].partition(":")
+        app = getattr(__import__(modulo, fromlist=[nome]), nome)
+        transporte = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transporte, base_url="http://localhost", limits=limites,
+                                     timeout=args.timeout) as cliente:
+            relatorio = await executar(cliente, mistura, args.concorrencia, args.duracao, args.aquecimento, args.semente)
+        return {"contexto": contexto, **relatorio}
+
+    porta = porta_livre()
+    processo = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "--host", "127.0.0.1", "--port", str(porta),
+         "--workers", str(args.workers), "--log-level", "warning", APLICACOES[args.app]],
+        cwd=RAIZ,
+    )
+    try:
+        # TrustedHostMiddleware da API Starlette só aceita localhost
+        url = f"http://localhost:{porta}"
+        await esperar_servidor(url, "/health" if args.app == "starlette" else "/", processo)
+        async with httpx.AsyncClient(base_url=url, limits=limites, timeout=args.timeout) as cliente:
+            relatorio = await executar(cliente, mistura, args.concorrencia, args.duracao, args.aquecimento, args.semente)
+    finally:
+        processo.terminate()
+        processo.wait(timeout=10)
+    return {"contexto": contexto, **relatorio}
+
+def imprimir(relatorio: dict):
+    print(f"{'cenário':<14} {'req':>7} {'erros':>6} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for nome, resumo in [*relatorio["cenarios"].items(), ("total", relatorio["total"])]:
+        print(
+            f"{nome:<14} {resumo['requisicoes']:>7} {resumo['erros']:>6} {resumo['vazao_rps']:>9.1f} "
+            f"{resumo.get('p50_ms', float('nan')):>9.2f} {resumo.get('p95_ms', float('nan')):>9.2f} "
+            f"{resumo.get('p99_ms', float('nan')):>9.2f}"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", choices=APLICACOES, default="fastapi")
+    parser.add_argument("--mix", help="Pesos por cenário, ex.: padrao=4,sliders=4,lote=1,monte_carlo=1")
+    parser.add_argument("--concorrencia", type=int, default=16, help="Clientes simultâneos")
+    parser.add_argument("--duracao", type=float, default=10.0, help="Segundos de medição")
+    parser.add_argument("--aquecimento", type=int, default=2, help="Clientes de aquecimento (0 desativa)")
+    parser.add_argument("--uvicorn", action="store_true", help="Sobe a aplicação num uvicorn local")
+    parser.add_argument("--workers", type=int, default=1, help="Workers do uvicorn")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--saida", help="Arquivo do relatório JSON (padrão: stdout)")
+    args = parser.parse_args()
+
+    relatorio = asyncio.run(principal(args))
+    if args.saida:
+        with open(args.saida, "w") as arquivo:
+            json.dump(relatorio, arquivo, indent=2)
+        imprimir(relatorio)
+    else:
+        json.dump(relatorio, sys.stdout, indent=2)
+        print()
+
+if __name__ == "__main__":
+    main()
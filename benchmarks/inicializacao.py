@@ -0,0 +1,178 @@
+"""Mede o cold start das APIs: tempo e memória até a primeira resposta
+
+Cada medição é um processo Python novo que importa a aplicação e faz uma
+única requisição pela interface ASGI, sem servidor e sem cliente HTTP:
+- fastapi: index.py até o primeiro POST /calcular com sucesso
+- starlette: api/index.py até o primeiro GET /health com sucesso
+
+Os tempos contam desde antes de o processo ser criado (inclui a subida do
+interpretador) até o fim da importação e até a resposta; a memória é o
+RSS máximo do processo. Uma execução extra com -X importtime dá o custo de
+importação por pacote. Com orçamentos (--orcamento-ms, --orcamento-rss-mb),
+o script sai com código 1 quando a mediana passa do limite.
+
+Uso: python benchmarks/inicializacao.py [--alvos fastapi,starlette] [--repeticoes 5]
+     [--orcamento-ms fastapi=2500,starlette=800] [--saida relatorio.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Aplicação, método, caminho e corpo da primeira requisição de cada alvo
+ALVOS = {
+    "fastapi": ("index", "POST", "/calcular", {
+        "aporte_mensal": 2000.0, "anos": 25, "taxa_retorno": 0.10, "taxa_retirada": 0.04,
+    }),
+    "starlette": ("api.index", "GET", "/health", None),
+}
+
+# Orçamentos padrão (mediana), folgados para não falhar por ruído da máquina
+ORCAMENTO_MS = {"fastapi": 3000.0, "starlette": 1000.0}
+ORCAMENTO_RSS_MB = {"fastapi": 250.0, "starlette": 80.0}
+
+async def chamar_asgi(app, metodo: str, caminho: str, corpo: bytes = b"") -> int:
+    """Faz uma requisição direto na aplicação ASGI e devolve o status"""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": metodo,
+        "scheme": "http",
+        "path": caminho,
+        "raw_path": caminho.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"host", b"localhost"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(corpo)).encode()),
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("localhost", 80),
+    }
+    mensagens = [{"type": "http.request", "body": corpo, "more_body": False}]
+    status = []
+
+    async def receive():
+        return mensagens.pop(0) if mensagens else {"type": "http.disconnect"}
+
+    async def send(mensagem):
+        if mensagem["type"] == "http.response.start":
+            status.append(mensagem["status"])
+
+    await app(scope, receive, send)
+    return status[0]
+
+def filho(alvo: str, inicio: float):
+    """Roda dentro do processo medido e imprime os marcos em JSON"""
+    sys.path.insert(0, RAIZ)
+    modulo, metodo, caminho, corpo = ALVOS[alvo]
+    app = __import__(modulo, fromlist=["app"]).app
+    importado = time.time()
+    status = asyncio.run(chamar_asgi(app, metodo, caminho, json.dumps(corpo).encode() if corpo else b""))
+    respondido = time.time()
+    print(json.dumps({
+        "importacao_ms": (importado - inicio) * 1e3,
+        "primeira_resposta_ms": (respondido - inicio) * 1e3,
+        "status": status,
+        # ru_maxrss vem em KiB no Linux
+        "rss_max_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "modulos_carregados": len(sys.modules),
+    }))
+
+def medir(alvo: str, importtime: bool = False):
+    comando = [sys.executable]
+    if importtime:
+        comando += ["-X", "importtime"]
+    inicio = time.time()
+    processo = subprocess.run(
+        comando + [os.path.abspath(__file__), "--filho", alvo, repr(inicio)],
+        capture_output=True, text=True, cwd=RAIZ
+    )
+    if processo.returncode != 0:
+        raise SystemExit(f"{alvo}: o processo medido falhou\n{processo.stderr[-2000:]}")
+    return json.loads(processo.stdout.strip().splitlines()[-1]), processo.stderr
+
+def custo_importacao(saida_importtime: str, limite: int = 15):
+    """Soma o tempo próprio de cada pacote (primeiro nome do módulo) a partir do -X importtime"""
+    por_pacote = {}
+    for linha in saida_importtime.splitlines():
+        if not linha.startswith("import time:") or "self [us]" in linha:
+            continue
+        proprio, _, nome = linha[len("import time:"):].split("|")
+        pacote = nome.strip().split(".")[0]
+        por_pacote[pacote] = por_pacote.get(pacote, 0) + int(proprio)
+    mais_caros = sorted(por_pacote.items(), key=lambda item: -item[1])[:limite]
+    return [{"pacote": pacote, "ms": micros / 1e3} for pacote, micros in mais_caros]
+
+def ler_orcamento(texto: str, padrao: dict) -> dict:
+    orcamento = dict(padrao)
+    for parte in filter(None, (texto or "").split(",")):
+        alvo, _, valor = parte.partition("=")
+        orcamento[alvo] = float(valor)
+    return orcamento
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filho", nargs=2, metavar=("ALVO", "INICIO"), help=argparse.SUPPRESS)
+    parser.add_argument("--alvos", default=",".join(ALVOS))
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--orcamento-ms", help="Limite da primeira resposta por alvo, ex.: fastapi=2500")
+    parser.add_argument("--orcamento-rss-mb", help="Limite de RSS por alvo, ex.: starlette=60")
+    parser.add_argument("--saida", help="Arquivo do relatório JSON")
+    args = parser.parse_args()
+
+    if args.filho:
+        filho(args.filho[0], float(args.filho[1]))
+        return 0
+
+    orcamento_ms = ler_orcamento(args.orcamento_ms, ORCAMENTO_MS)
+    orcamento_rss = ler_orcamento(args.orcamento_rss_mb, ORCAMENTO_RSS_MB)
+    relatorio = {"python": sys.version.split()[0], "data": time.strftime("%Y-%m-%dT%H:%M:%S"), "alvos": {}}
+    estourados = []
+
+    for alvo in args.alvos.split(","):
+        medidas = [medir(alvo)[0] for _ in range(args.repeticoes)]
+        _, importtime = medir(alvo, importtime=True)
+        resumo = {
+            campo: statistics.median(medida[campo] for medida in medidas)
+            for campo in ("importacao_ms", "primeira_resposta_ms", "rss_max_mb", "modulos_carregados")
+        }
+        resumo["status"] = sorted({medida["status"] for medida in medidas})
+        resumo["medidas"] = medidas
+        resumo["importacao_por_pacote"] = custo_importacao(importtime)
+        resumo["orcamento_ms"] = orcamento_ms.get(alvo)
+        resumo["orcamento_rss_mb"] = orcamento_rss.get(alvo)
+        relatorio["alvos"][alvo] = resumo
+
+        print(f"{alvo}: importação {resumo['importacao_ms']:.0f} ms, primeira resposta "
+              f"{resumo['primeira_resposta_ms']:.0f} ms, RSS {resumo['rss_max_mb']:.0f} MB, "
+              f"{resumo['modulos_carregados']:.0f} módulos, status {resumo['status']}")
+        for item in resumo["importacao_por_pacote"][:8]:
+            print(f"    {item['pacote']:<24} {item['ms']:>8.1f} ms")
+
+        if resumo["status"] != [200]:
+            estourados.append(f"{alvo}: status {resumo['status']}")
+        if resumo["orcamento_ms"] and resumo["primeira_resposta_ms"] > resumo["orcamento_ms"]:
+            estourados.append(f"{alvo}: {resumo['primeira_resposta_ms']:.0f} ms > {resumo['orcamento_ms']:.0f} ms")
+        if resumo["orcamento_rss_mb"] and resumo["rss_max_mb"] > resumo["orcamento_rss_mb"]:
+            estourados.append(f"{alvo}: {resumo['rss_max_mb']:.0f} MB > {resumo['orcamento_rss_mb']:.0f} MB")
+
+    relatorio["estourados"] = estourados
+    if args.saida:
+        with open(args.saida, "w") as arquivo:
+            json.dump(relatorio, arquivo, indent=2)
+    for mensagem in estourados:
+        print(f"Orçamento estourado: {mensagem}")
+    return 1 if estourados else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+"""Compara o custo por requisição da resposta de /calcular antes e depois do caminho rápido
+
+Antes: séries como listas, validação contra AposentadoriaResponse,
+jsonable_encoder e json padrão (o que o FastAPI faz com um dict retornado).
+Depois: arrays NumPy, model_construct sem validação e orjson.
+
+Uso: python benchmarks/serializacao.py [repeticoes]
+"""
+import os
+import sys
+import timeit
+
+# Adiciona o diretório raiz ao PATH do Python
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+import formatos
+from index import AposentadoriaResponse, calcular_aposentadoria, calcular_aposentadoria_arrays
+
+def caminho_antigo(anos):
+    resultados = calcular_aposentadoria(2000, anos, 0.10, 0.04)
+    modelo = AposentadoriaResponse.model_validate(resultados)
+    return JSONResponse(jsonable_encoder(modelo)).body
+
+def caminho_rapido(anos):
+    resultados = calcular_aposentadoria_arrays(2000, anos, 0.10, 0.04)
+    return formatos.resposta_json(AposentadoriaResponse, resultados).body
+
+def medir(funcao, anos, repeticoes):
+    return min(timeit.repeat(lambda: funcao(anos), number=repeticoes, repeat=5)) / repeticoes * 1e6
+
+def main():
+    repeticoes = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    print(f"{'anos':>5} {'antes (µs)':>12} {'depois (µs)':>12} {'ganho':>7}")
+    for anos in (1, 10, 25, 50):
+        antes = medir(caminho_antigo, anos, repeticoes)
+        depois = medir(caminho_rapido, anos, repeticoes)
+        print(f"{anos:>5} {antes:>12.1f} {depois:>12.1f} {antes / depois:>6.1f}x")
+
+if __name__ == "__main__":
+    main()
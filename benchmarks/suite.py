@@ -0,0 +1,183 @@
+"""Micro-benchmarks do motor, da serialização e dos gráficos, com histórico em JSON
+
+Grupos:
+- calculo: um cenário (motor e /calcular com série anual e com LTTB) para horizontes de 1 a 50 anos
+- lote: motor.calcular_lote com 1 a 1.000.000 de cenários
+- monte_carlo: simulação sequencial com 1.000 a 100.000 caminhos
+- serializacao: AposentadoriaResponse em JSON, msgpack e Arrow IPC
+- graficos: evolução do patrimônio em PNG e SVG, sem e com cache
+
+Cada execução grava benchmarks/resultados/<data>-<hora>.json com os tempos
+(mínimo e mediana por chamada) e o contexto (commit, versões, máquina). Com
+--comparar, os tempos são comparados com a execução anterior e os casos
+mais lentos que a tolerância são marcados.
+
+Uso: python benchmarks/suite.py [--grupos calculo,lote] [--rapido] [--comparar [arquivo]]
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+
+# Adiciona o diretório raiz ao PATH do Python
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(RAIZ)
+
+import numpy as np
+
+import formatos
+import monte_carlo
+import motor
+from index import AposentadoriaResponse, calcular_aposentadoria_arrays
+
+PASTA_RESULTADOS = os.path.join(RAIZ, "benchmarks", "resultados")
+
+# Quanto mais lento (em fração) um caso pode ficar antes de ser marcado como regressão
+TOLERANCIA = 0.10
+
+def casos_calculo(rapido):
+    for anos in (1, 5, 10, 25, 50):
+        yield f"calculo/motor/anos={anos}", lambda anos=anos: motor.calcular_aposentadoria(2000, anos, 0.10, 0.04)
+        yield f"calculo/anual/anos={anos}", lambda anos=anos: calcular_aposentadoria_arrays(
+            2000, anos, 0.10, 0.04, resolucao_series="anual"
+        )
+        yield f"calculo/pontos/anos={anos}", lambda anos=anos: calcular_aposentadoria_arrays(
+            2000, anos, 0.10, 0.04, resolucao_series="pontos", pontos=100
+        )
+
+def casos_lote(rapido):
+    gerador = np.random.default_rng(0)
+    for tamanho in (1, 100, 10_000) if rapido else (1, 100, 10_000, 1_000_000):
+        entradas = {
+            "aporte_mensal": gerador.uniform(0, 20000, tamanho),
+            "anos": gerador.integers(1, 51, tamanho),
+            "taxa_retorno": gerador.uniform(0.01, 0.20, tamanho),
+            "taxa_retirada": gerador.uniform(0.01, 0.10, tamanho),
+        }
+        yield f"lote/cenarios={tamanho}", lambda entradas=entradas: motor.calcular_lote(**entradas)
+
+def casos_monte_carlo(rapido):
+    for caminhos in (1_000, 10_000) if rapido else (1_000, 10_000, 100_000):
+        yield f"monte_carlo/caminhos={caminhos}", lambda caminhos=caminhos: monte_carlo.simular(
+            2000, 25, 0.10, 0.15, caminhos, semente=0
+        )
+
+def casos_serializacao(rapido):
+    for anos in (25, 50):
+        resultados = calcular_aposentadoria_arrays(2000, anos, 0.10, 0.04)
+        escalares = {campo: valor for campo, valor in resultados.items() if not isinstance(valor, np.ndarray)}
+        series = {campo: valor for campo, valor in resultados.items() if isinstance(valor, np.ndarray)}
+
+        yield f"serializacao/json/anos={anos}", lambda resultados=resultados: formatos.resposta_json(
+            AposentadoriaResponse, resultados
+        ).body
+        for tipo, nome in ((formatos.TIPO_MSGPACK, "msgpack"), (formatos.TIPO_ARROW, "arrow")):
+            if tipo in formatos.tipos_disponiveis():
+                yield f"serializacao/{nome}/anos={anos}", lambda tipo=tipo, escalares=escalares, series=series: (
+                    formatos.resposta_binaria(tipo, {}, escalares, series).body
+                )
+
+def casos_graficos(rapido):
+    import graficos
+
+    # Sem cache mede a renderização; com cache, só a consulta
+    sem_cache = graficos.RenderizadorGraficos(max_entradas=0)
+    com_cache = graficos.RenderizadorGraficos()
+    for formato in graficos.FORMATOS:
+        yield f"graficos/{formato}", lambda formato=formato: sem_cache.evolucao(2000, 25, 0.10, formato)
+    yield "graficos/png/cache", lambda: com_cache.evolucao(2000, 25, 0.10)
+
+GRUPOS = {
+    "calculo": casos_calculo,
+    "lote": casos_lote,
+    "monte_carlo": casos_monte_carlo,
+    "serializacao": casos_serializacao,
+    "graficos": casos_graficos,
+}
+
+def medir(funcao, repeticoes: int = 5):
+    """Tempo por chamada: autorange escolhe quantas chamadas somam ao menos 0,2 s"""
+    temporizador = timeit.Timer(funcao)
+    numero, _ = temporizador.autorange()
+    tempos = [tempo / numero for tempo in temporizador.repeat(repeat=repeticoes, number=numero)]
+    return {"minimo_s": min(tempos), "mediana_s": statistics.median(tempos), "chamadas": numero * repeticoes}
+
+def contexto():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "maquina": platform.machine(),
+        "processador": platform.processor(),
+        "cpus": os.cpu_count(),
+    }
+
+def ultimo_resultado(excluir=None):
+    arquivos = sorted(arquivo for arquivo in glob.glob(os.path.join(PASTA_RESULTADOS, "*.json")) if arquivo != excluir)
+    return arquivos[-1] if arquivos else None
+
+def comparar(atual: dict, anterior: dict, tolerancia: float = TOLERANCIA):
+    """Razão entre os tempos mínimos de cada caso presente nas duas execuções"""
+    regressoes = []
+    print(f"\n{'caso':<40} {'antes':>12} {'agora':>12} {'razão':>7}")
+    for nome, medida in atual["resultados"].items():
+        if nome not in anterior["resultados"]:
+            continue
+        antes = anterior["resultados"][nome]["minimo_s"]
+        razao = medida["minimo_s"] / antes
+        marca = " <- mais lento" if razao > 1 + tolerancia else ""
+        if marca:
+            regressoes.append(nome)
+        print(f"{nome:<40} {antes * 1e6:>10.1f}µs {medida['minimo_s'] * 1e6:>10.1f}µs {razao:>6.2f}x{marca}")
+    return regressoes
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--grupos", default=",".join(GRUPOS), help="Grupos separados por vírgula")
+    parser.add_argument("--rapido", action="store_true", help="Omite os maiores lotes e simulações")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--comparar", nargs="?", const="", default=None,
+                        help="Compara com um resultado salvo (padrão: o mais recente)")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA)
+    parser.add_argument("--falhar-regressao", action="store_true", help="Sai com código 1 se houver regressão")
+    args = parser.parse_args()
+
+    resultados = {}
+    for grupo in args.grupos.split(","):
+        for nome, funcao in GRUPOS[grupo](args.rapido):
+            resultados[nome] = medir(funcao, args.repeticoes)
+            print(f"{nome:<40} {resultados[nome]['minimo_s'] * 1e6:>12.1f}µs")
+
+    execucao = {"contexto": contexto(), "resultados": resultados}
+    os.makedirs(PASTA_RESULTADOS, exist_ok=True)
+    caminho = os.path.join(PASTA_RESULTADOS, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    with open(caminho, "w") as arquivo:
+        json.dump(execucao, arquivo, indent=2)
+    print(f"\nResultados gravados em {caminho}")
+
+    if args.comparar is not None:
+        referencia = args.comparar or ultimo_resultado(excluir=caminho)
+        if referencia is None:
+            print("Nenhum resultado anterior para comparar")
+            return 0
+        with open(referencia) as arquivo:
+            regressoes = comparar(execucao, json.load(arquivo), args.tolerancia)
+        if regressoes and args.falhar_regressao:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
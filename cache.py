@@ -0,0 +1,312 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+import motor
+
+# Casas decimais usadas para quantizar cada parâmetro antes de montar a chave
+QUANTIZACAO = {
+    "aporte_mensal": 2,
+    "taxa_retorno": 6,
+    "taxa_retirada": 6,
+    "crescimento_aporte": 6,
+    "inflacao": 6,
+}
+
+# Custo aproximado de um resultado além dos buffers dos arrays (dict, floats, chave)
+BYTES_POR_ENTRADA = 1024
+
+def normalizar(parametros: dict) -> dict:
+    """Quantiza os parâmetros para que entradas equivalentes caiam na mesma chave"""
+    return {
+        nome: round(float(valor), QUANTIZACAO[nome]) if nome in QUANTIZACAO else valor
+        for nome, valor in parametros.items()
+    }
+
+def chave(operacao: str, parametros: dict) -> tuple:
+    """Chave do cache: operação, versão do motor e parâmetros já normalizados"""
+    return (operacao, motor.VERSAO) + tuple(sorted(parametros.items()))
+
+def etag(chave: tuple, *variantes) -> str:
+    """ETag forte de uma resposta: a chave do cache (que já inclui a versão
+    do motor) e o que mais mudar a representação, como o formato negociado"""
+    return '"' + hashlib.sha256(repr((chave,) + variantes).encode()).hexdigest()[:32] + '"'
+
+def etag_corresponde(if_none_match: str, valor: str) -> bool:
+    """Compara If-None-Match com a ETag atual (comparação fraca, como manda o RFC 9110)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidato.strip().removeprefix("W/") == valor
+        for candidato in if_none_match.split(",")
+    )
+
+def tamanho_resultado(resultado: dict) -> int:
+    """Estimativa dos bytes ocupados por um resultado em cache"""
+    return BYTES_POR_ENTRADA + sum(valor.nbytes for valor in resultado.values() if isinstance(valor, np.ndarray))
+
+class CacheResultados:
+    """Cache LRU em memória com TTL, limite de entradas e de bytes
+
+    Os arrays guardados ficam somente leitura e cada consulta devolve uma
+    cópia rasa do dict, então quem usa o resultado pode remover ou trocar
+    chaves sem afetar o cache.
+    """
+
+    def __init__(self, max_entradas: int = 4096, max_bytes: int = 64 * 1024 * 1024, ttl: float = 3600.0):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entradas = OrderedDict()
+        self._trava = threading.Lock()
+        self.bytes = 0
+        self.acertos = 0
+        self.falhas = 0
+        self.remocoes = 0
+        self.expiracoes = 0
+
+    @property
+    def ativo(self) -> bool:
+        return self.max_entradas > 0 and self.max_bytes > 0
+
+    def obter(self, chave):
+        """Devolve o resultado em cache ou None, contando acerto ou falha"""
+        agora = time.monotonic()
+        with self._trava:
+            entrada = self._entradas.get(chave)
+            if entrada is not None and self.ttl > 0 and agora - entrada[0] > self.ttl:
+                self._remover(chave)
+                self.expiracoes += 1
+                entrada = None
+            if entrada is None:
+                self.falhas += 1
+                return None
+            self._entradas.move_to_end(chave)
+            self.acertos += 1
+            return dict(entrada[1])
+
+    def guardar(self, chave, resultado: dict):
+        """Guarda um resultado, removendo os menos usados até caber nos limites"""
+        if not self.ativo:
+            return
+        for valor in resultado.values():
+            if isinstance(valor, np.ndarray):
+                valor.flags.writeable = False
+        tamanho = tamanho_resultado(resultado)
+        if tamanho > self.max_bytes:
+            return
+
+        with self._trava:
+            if chave in self._entradas:
+                self._remover(chave)
+            self._entradas[chave] = (time.monotonic(), dict(resultado), tamanho)
+            self.bytes += tamanho
+            while len(self._entradas) > self.max_entradas or self.bytes > self.max_bytes:
+                self._remover(next(iter(self._entradas)))
+                self.remocoes += 1
+
+    def _remover(self, chave):
+        _, _, tamanho = self._entradas.pop(chave)
+        self.bytes -= tamanho
+
+    def limpar(self):
+        with self._trava:
+            self._entradas.clear()
+            self.bytes = 0
+
+    def estatisticas(self) -> dict:
+        """Contadores de uso do cache"""
+        consultas = self.acertos + self.falhas
+        return {
+            "entradas": len(self._entradas),
+            "bytes": self.bytes,
+            "max_entradas": self.max_entradas,
+            "max_bytes": self.max_bytes,
+            "ttl_segundos": self.ttl,
+            "acertos": self.acertos,
+            "falhas": self.falhas,
+            "remocoes": self.remocoes,
+            "expiracoes": self.expiracoes,
+            "taxa_acerto": self.acertos / consultas if consultas else 0.0,
+        }
+
+class CacheSQLite:
+    """Cache de resultados em disco, compartilhado pelos processos de um mesmo nó
+
+    Usa SQLite em modo WAL, que permite leitores concorrentes enquanto um
+    processo escreve. Os escalares são guardados em JSON e as séries num
+    único blob com os bytes dos arrays em float64 e int64, sem perda: um
+    acerto em disco devolve exatamente o que o cálculo devolveria, então a
+    resposta (e a ETag forte) não depende de qual worker ou camada atendeu.
+    Quando o total passa de max_bytes, as entradas acessadas há mais tempo
+    são removidas. Erros do SQLite (como banco ocupado) viram falhas de
+    cache em vez de erros da requisição. As consultas rodam no event loop,
+    dentro dos handlers, então a espera pela trava de outro processo é curta
+    (espera, em segundos): passado esse tempo a operação desiste em vez de
+    parar todas as requisições do worker.
+    """
+
+    # A cada quantas gravações o processo confere o tamanho total do banco
+    INTERVALO_LIMPEZA = 64
+    # Leituras só atualizam o horário de acesso se ele for mais antigo que isto
+    INTERVALO_ACESSO = 60.0
+    # Versão do formato gravado; entra na chave, então linhas de outro formato são ignoradas
+    FORMATO = 2
+
+    def __init__(self, caminho: str, max_bytes: int = 256 * 1024 * 1024, ttl: float = 86400.0,
+                 espera: float = 0.02):
+        self.caminho = caminho
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.espera = espera
+        self._local = threading.local()
+        self._gravacoes = 0
+        self.acertos = 0
+        self.falhas = 0
+        self.erros = 0
+
+    def _conexao(self) -> sqlite3.Connection:
+        """Uma conexão por thread e por processo (conexões não sobrevivem a um fork)"""
+        conexao = getattr(self._local, "conexao", None)
+        if conexao is None or self._local.pid != os.getpid():
+            conexao = sqlite3.connect(self.caminho, timeout=self.espera, isolation_level=None)
+            try:
+                conexao.execute("PRAGMA journal_mode=WAL")
+                conexao.execute("PRAGMA synchronous=NORMAL")
+                conexao.execute(
+                    "CREATE TABLE IF NOT EXISTS resultados ("
+                    "chave TEXT PRIMARY KEY, criado REAL, acessado REAL, tamanho INTEGER, "
+                    "escalares TEXT, layout TEXT, series BLOB)"
+                )
+                conexao.execute("CREATE INDEX IF NOT EXISTS resultados_acessado ON resultados (acessado)")
+            except sqlite3.Error:
+                # Banco ocupado na criação: tenta de novo na próxima consulta
+                conexao.close()
+                raise
+            self._local.conexao = conexao
+            self._local.pid = os.getpid()
+        return conexao
+
+    @classmethod
+    def _chave_texto(cls, chave) -> str:
+        return hashlib.sha1(repr((cls.FORMATO, chave)).encode()).hexdigest()
+
+    @staticmethod
+    def _empacotar(resultado: dict):
+        escalares, layout, blobs = {}, [], []
+        for nome, valor in resultado.items():
+            if isinstance(valor, np.ndarray):
+                dtype = "<i8" if np.issubdtype(valor.dtype, np.integer) else "<f8"
+                layout.append((nome, dtype, len(valor)))
+                blobs.append(np.ascontiguousarray(valor, dtype=dtype).tobytes())
+            else:
+                escalares[nome] = valor
+        return json.dumps(escalares), json.dumps(layout), b"".join(blobs)
+
+    @staticmethod
+    def _desempacotar(escalares: str, layout: str, series: bytes) -> dict:
+        resultado = json.loads(escalares)
+        posicao = 0
+        for nome, dtype, comprimento in json.loads(layout):
+            # Lido direto do blob, sem cópia; o buffer de bytes já é somente leitura
+            valores = np.frombuffer(series, dtype=dtype, count=comprimento, offset=posicao)
+            posicao += valores.nbytes
+            resultado[nome] = valores
+        return resultado
+
+    def obter(self, chave):
+        """Devolve o resultado gravado em disco ou None"""
+        agora = time.time()
+        texto = self._chave_texto(chave)
+        try:
+            conexao = self._conexao()
+            linha = conexao.execute(
+                "SELECT criado, acessado, escalares, layout, series FROM resultados WHERE chave = ?", (texto,)
+            ).fetchone()
+            if linha is None or (self.ttl > 0 and agora - linha[0] > self.ttl):
+                self.falhas += 1
+                return None
+            if agora - linha[1] > self.INTERVALO_ACESSO:
+                conexao.execute("UPDATE resultados SET acessado = ? WHERE chave = ?", (agora, texto))
+        except sqlite3.Error:
+            self.erros += 1
+            self.falhas += 1
+            return None
+        self.acertos += 1
+        return self._desempacotar(linha[2], linha[3], linha[4])
+
+    def guardar(self, chave, resultado: dict):
+        """Grava um resultado; de tempos em tempos remove os menos acessados para caber em max_bytes"""
+        escalares, layout, series = self._empacotar(resultado)
+        tamanho = len(escalares) + len(layout) + len(series)
+        agora = time.time()
+        try:
+            conexao = self._conexao()
+            conexao.execute(
+                "INSERT OR REPLACE INTO resultados VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self._chave_texto(chave), agora, agora, tamanho, escalares, layout, series)
+            )
+            self._gravacoes += 1
+            if self._gravacoes % self.INTERVALO_LIMPEZA == 0:
+                self._limitar_tamanho(conexao)
+        except sqlite3.Error:
+            self.erros += 1
+
+    def _limitar_tamanho(self, conexao: sqlite3.Connection):
+        """Remove as entradas acessadas há mais tempo até o total ficar em 90% de max_bytes"""
+        total = conexao.execute("SELECT COALESCE(SUM(tamanho), 0) FROM resultados").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excesso = total - int(self.max_bytes * 0.9)
+        conexao.execute(
+            "DELETE FROM resultados WHERE chave IN ("
+            "SELECT chave FROM (SELECT chave, tamanho, SUM(tamanho) OVER (ORDER BY acessado) AS acumulado "
+            "FROM resultados) WHERE acumulado - tamanho < ?)",
+            (excesso,)
+        )
+
+    def estatisticas(self) -> dict:
+        """Contadores deste processo e tamanho atual do banco"""
+        try:
+            entradas, total = self._conexao().execute(
+                "SELECT COUNT(*), COALESCE(SUM(tamanho), 0) FROM resultados"
+            ).fetchone()
+        except sqlite3.Error:
+            entradas, total = None, None
+        consultas = self.acertos + self.falhas
+        return {
+            "caminho": self.caminho,
+            "entradas": entradas,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "ttl_segundos": self.ttl,
+            "acertos": self.acertos,
+            "falhas": self.falhas,
+            "erros": self.erros,
+            "taxa_acerto": self.acertos / consultas if consultas else 0.0,
+        }
+
+# Cache do processo, configurável por variáveis de ambiente (0 entradas desativa)
+calculos = CacheResultados(
+    max_entradas=int(os.environ.get("CACHE_MAX_ENTRADAS", "4096")),
+    max_bytes=int(os.environ.get("CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    ttl=float(os.environ.get("CACHE_TTL_SEGUNDOS", "3600")),
+)
+
+# Cache em disco opcional, ativado quando CACHE_SQLITE_CAMINHO aponta para um arquivo
+disco = None
+if os.environ.get("CACHE_SQLITE_CAMINHO"):
+    disco = CacheSQLite(
+        os.environ["CACHE_SQLITE_CAMINHO"],
+        max_bytes=int(os.environ.get("CACHE_SQLITE_MAX_BYTES", str(256 * 1024 * 1024))),
+        ttl=float(os.environ.get("CACHE_SQLITE_TTL_SEGUNDOS", "86400")),
+        espera=float(os.environ.get("CACHE_SQLITE_ESPERA_SEGUNDOS", "0.02")),
+    )
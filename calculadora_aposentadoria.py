@@ -1,7 +1,67 @@
 import streamlit as st
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.ticker import FuncFormatter
+
+import motor
+from motor import validar_entrada
+
+# Rótulo, mínimo, máximo, passo e escala de exibição de cada parâmetro da análise de sensibilidade
+PARAMETROS_SENSIBILIDADE = {
+    "aporte_mensal": ("Aporte mensal (R$)", 0.0, 20000.0, 100.0, 1),
+    "anos": ("Anos até a aposentadoria", 1, 50, 1, 1),
+    "taxa_retorno": ("Taxa de retorno anual (%)", 1.0, 20.0, 0.1, 100),
+    "taxa_retirada": ("Taxa de retirada anual (%)", 1.0, 10.0, 0.1, 100),
+}
+
+# Máximo de resultados guardados pelo cache do Streamlit, compartilhado entre sessões
+CACHE_MAX_ENTRADAS = 256
+
+def formatar_moeda(valor, pos=None):
+    """Função auxiliar para formatar valores em R$"""
+    if pos is None:  # Uso direto
+        return f'R$ {valor:,.2f}'
+    return f'R$ {valor:,.0f}'  # Uso no gráfico
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRADAS, show_spinner=False)
+def calcular_aposentadoria(aporte_mensal, anos, taxa_retorno, taxa_retirada):
+    """Calcula os valores da aposentadoria
+
+    O resultado fica no cache do Streamlit, então as mesmas entradas não
+    são recalculadas em outra sessão ou em outro envio do formulário.
+    Entradas inválidas geram ValueError, que não é guardado no cache.
+    """
+    aporte_mensal = validar_entrada(aporte_mensal, 0, 1000000, "Aporte mensal")
+    anos = validar_entrada(anos, 1, 50, "Anos até aposentadoria")
+    taxa_retorno = validar_entrada(taxa_retorno, 0.01, 0.20, "Taxa de retorno")
+    taxa_retirada = validar_entrada(taxa_retirada, 0.01, 0.10, "Taxa de retirada")
+
+    return motor.calcular_aposentadoria(aporte_mensal, anos, taxa_retorno, taxa_retirada)
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRADAS, show_spinner=False)
+def calcular_grade(base, parametro_x, valores_x, parametro_y, valores_y):
+    """motor.grade_sensibilidade com cache do Streamlit"""
+    return motor.grade_sensibilidade(base, parametro_x, valores_x, parametro_y, valores_y)
+
+@st.cache_resource
+def renderizador():
+    """Renderizador de gráficos compartilhado por todas as sessões do processo
+
+    O Matplotlib só é importado quando o primeiro gráfico é pedido.
+    """
+    import graficos
+
+    return graficos.RenderizadorGraficos()
+
+def memorizar(nome, entradas, calcular):
+    """Guarda o último resultado de cada seção na sessão
+
+    Enquanto as entradas não mudam, reruns causados por outros widgets
+    reutilizam o resultado (e os gráficos já renderizados) da sessão.
+    """
+    memoria = st.session_state.get(nome)
+    if memoria is None or memoria[0] != entradas:
+        memoria = (entradas, calcular())
+        st.session_state[nome] = memoria
+    return memoria[1]
 
 def main():
     # Configuração da página
@@ -24,45 +84,6 @@ def main():
         </style>
     """, unsafe_allow_html=True)
 
-    def formatar_moeda(valor, pos=None):
-        """Função auxiliar para formatar valores em R$"""
-        if pos is None:  # Uso direto
-            return f'R$ {valor:,.2f}'
-        return f'R$ {valor:,.0f}'  # Uso no gráfico
-
-    def validar_entrada(valor, min_valor, max_valor, nome_campo):
-        """Valida os valores de entrada"""
-        if not isinstance(valor, (int, float)):
-            raise ValueError(f"{nome_campo} deve ser um número")
-        if valor < min_valor or valor > max_valor:
-            raise ValueError(f"{nome_campo} deve estar entre {min_valor} e {max_valor}")
-        return valor
-
-    def calcular_aposentadoria(aporte_mensal, anos, taxa_retorno, taxa_retirada):
-        """Calcula os valores da aposentadoria"""
-        try:
-            # Validar entradas
-            aporte_mensal = validar_entrada(aporte_mensal, 0, 1000000, "Aporte mensal")
-            anos = validar_entrada(anos, 1, 50, "Anos até aposentadoria")
-            taxa_retorno = validar_entrada(taxa_retorno, 0.01, 0.20, "Taxa de retorno")
-            taxa_retirada = validar_entrada(taxa_retirada, 0.01, 0.10, "Taxa de retirada")
-            
-            meses = anos * 12
-            taxa_mensal = (1 + taxa_retorno) ** (1/12) - 1
-            
-            saldo_acumulado = [0]
-            aportes_totais = [0]
-            
-            for mes in range(1, meses + 1):
-                saldo = saldo_acumulado[-1] * (1 + taxa_mensal) + aporte_mensal
-                saldo_acumulado.append(saldo)
-                aportes_totais.append(aporte_mensal * mes)
-                
-            return saldo_acumulado, aportes_totais
-        except Exception as e:
-            st.error(f"Erro nos cálculos: {str(e)}")
-            return None, None
-
     # Título e descrição
     st.title("💰 Calculadora de Aposentadoria")
     st.write("""
@@ -114,78 +135,144 @@ def main():
         calcular = st.form_submit_button("Calcular Projeção")
 
     if calcular:
-        saldo_acumulado, aportes_totais = calcular_aposentadoria(
-            aporte_mensal, 
-            anos_ate_aposentadoria, 
-            taxa_retorno_anual, 
-            taxa_retirada_anual
-        )
-
-        if saldo_acumulado and aportes_totais:
-            valor_final = saldo_acumulado[-1]
-            total_investido = aportes_totais[-1]
-            rendimentos = valor_final - total_investido
-            saque_mensal = (valor_final * taxa_retirada_anual) / 12
-
-            # Exibir resultados em cards
-            st.subheader("📊 Resultados")
-            
-            col1, col2, col3, col4 = st.columns(4)
+        entradas = (aporte_mensal, anos_ate_aposentadoria, taxa_retorno_anual, taxa_retirada_anual)
+        try:
+            memorizar("projecao", entradas, lambda: calcular_aposentadoria(*entradas))
+        except Exception as e:
+            st.error(f"Erro nos cálculos: {str(e)}")
+            st.session_state.pop("projecao", None)
+
+    # A projeção calculada continua na tela quando outro formulário é enviado
+    if "projecao" in st.session_state:
+        (aporte_projecao, anos_projecao, taxa_projecao, _), resultados = st.session_state["projecao"]
+        valor_final = resultados["valor_final"]
+        total_investido = resultados["total_investido"]
+        rendimentos = resultados["rendimentos"]
+        saque_mensal = resultados["saque_mensal"]
+
+        # Exibir resultados em cards
+        st.subheader("📊 Resultados")
+        
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            st.metric(
+                "Valor Total Acumulado",
+                formatar_moeda(valor_final),
+                delta=f"{(valor_final/total_investido - 1)*100:.1f}%"
+            )
+        
+        with col2:
+            st.metric(
+                "Total Investido",
+                formatar_moeda(total_investido)
+            )
             
-            with col1:
-                st.metric(
-                    "Valor Total Acumulado",
-                    formatar_moeda(valor_final),
-                    delta=f"{(valor_final/total_investido - 1)*100:.1f}%"
-                )
+        with col3:
+            st.metric(
+                "Rendimentos",
+                formatar_moeda(rendimentos),
+                delta=f"{(rendimentos/total_investido)*100:.1f}%"
+            )
             
-            with col2:
-                st.metric(
-                    "Total Investido",
-                    formatar_moeda(total_investido)
+        with col4:
+            st.metric(
+                "Saque Mensal Possível",
+                formatar_moeda(saque_mensal),
+                delta=f"{(saque_mensal/valor_final)*100:.1f}% a.a."
+            )
+
+        # Gráfico renderizado uma vez por projeção
+        grafico = memorizar("grafico_projecao", st.session_state["projecao"][0], lambda: renderizador().evolucao(
+            aporte_projecao, anos_projecao, taxa_projecao
+        ))
+        st.image(grafico, use_column_width=True)
+
+        # Informações adicionais
+        st.subheader("📝 Informações Adicionais")
+        st.write(f"""
+        - Seu patrimônio será multiplicado por {valor_final/total_investido:.1f}x
+        - Os rendimentos representam {(rendimentos/valor_final)*100:.1f}% do valor final
+        - O saque mensal representa {(saque_mensal/valor_final)*100:.1f}% do valor final ao mês
+        """)
+
+    # Análise de sensibilidade
+    st.subheader("🔥 Análise de Sensibilidade")
+    st.write("Veja como o resultado muda ao variar dois parâmetros ao mesmo tempo, mantendo os demais do formulário acima.")
+
+    base = {
+        "aporte_mensal": aporte_mensal,
+        "anos": anos_ate_aposentadoria,
+        "taxa_retorno": taxa_retorno_anual,
+        "taxa_retirada": taxa_retirada_anual,
+    }
+    nomes = {parametro: rotulo for parametro, (rotulo, *_) in PARAMETROS_SENSIBILIDADE.items()}
+
+    with st.form("sensibilidade_form"):
+        col1, col2 = st.columns(2)
+        faixas = {}
+
+        for coluna, eixo, padrao in ((col1, "x", "taxa_retorno"), (col2, "y", "anos")):
+            with coluna:
+                parametro = st.selectbox(
+                    f"Parâmetro do eixo {eixo.upper()}",
+                    options=list(PARAMETROS_SENSIBILIDADE),
+                    index=list(PARAMETROS_SENSIBILIDADE).index(padrao),
+                    format_func=nomes.get,
+                    key=f"sensibilidade_parametro_{eixo}"
                 )
-                
-            with col3:
-                st.metric(
-                    "Rendimentos",
-                    formatar_moeda(rendimentos),
-                    delta=f"{(rendimentos/total_investido)*100:.1f}%"
+                rotulo, minimo, maximo, passo, escala = PARAMETROS_SENSIBILIDADE[parametro]
+                atual = min(max(base[parametro] * escala, minimo), maximo)
+                inicio, fim = st.slider(
+                    f"Faixa de {rotulo}",
+                    min_value=minimo,
+                    max_value=maximo,
+                    value=(max(minimo, type(minimo)(atual - 10 * passo)), min(maximo, type(minimo)(atual + 10 * passo))),
+                    step=passo,
+                    key=f"sensibilidade_faixa_{eixo}"
                 )
-                
-            with col4:
-                st.metric(
-                    "Saque Mensal Possível",
-                    formatar_moeda(saque_mensal),
-                    delta=f"{(saque_mensal/valor_final)*100:.1f}% a.a."
+                pontos = st.slider(
+                    "Pontos no eixo",
+                    min_value=2,
+                    max_value=50,
+                    value=11,
+                    key=f"sensibilidade_pontos_{eixo}"
                 )
+                valores = np.linspace(inicio, fim, pontos) / escala
+                if parametro == "anos":
+                    valores = np.unique(np.round(valores)).astype(int)
+                faixas[eixo] = (parametro, valores)
 
-            # Gerar gráfico
-            fig, ax = plt.subplots(figsize=(10, 6))
-            
-            meses = np.arange(0, anos_ate_aposentadoria * 12 + 1)
-            anos = meses / 12
-            
-            ax.plot(anos, saldo_acumulado, label="Saldo Acumulado", color="#1f77b4", linewidth=2)
-            ax.plot(anos, aportes_totais, label="Total Investido", color="#2ca02c", linewidth=2)
-            ax.fill_between(anos, aportes_totais, saldo_acumulado, alpha=0.3, color="#1f77b4", label="Rendimentos")
-            
-            ax.yaxis.set_major_formatter(FuncFormatter(formatar_moeda))
-            ax.grid(True, linestyle='--', alpha=0.7)
-            ax.set_title("Evolução do Patrimônio ao Longo do Tempo", pad=20)
-            ax.set_xlabel("Anos")
-            ax.set_ylabel("Valor (R$)")
-            ax.legend(loc="upper left")
-            
-            st.pyplot(fig)
-            plt.close()
+        gerar_grade = st.form_submit_button("Gerar Grade")
 
-            # Informações adicionais
-            st.subheader("📝 Informações Adicionais")
-            st.write(f"""
-            - Seu patrimônio será multiplicado por {valor_final/total_investido:.1f}x
-            - Os rendimentos representam {(rendimentos/valor_final)*100:.1f}% do valor final
-            - O saque mensal representa {(saque_mensal/valor_final)*100:.1f}% do valor final ao mês
-            """)
+    if gerar_grade:
+        (parametro_x, valores_x), (parametro_y, valores_y) = faixas["x"], faixas["y"]
+        entradas = (tuple(base.items()), parametro_x, tuple(valores_x.tolist()), parametro_y, tuple(valores_y.tolist()))
+        try:
+            memorizar("grade", entradas, lambda: calcular_grade(base, parametro_x, valores_x, parametro_y, valores_y))
+        except ValueError as e:
+            st.error(str(e))
+            st.session_state.pop("grade", None)
+
+    if "grade" in st.session_state:
+        (_, parametro_x, valores_x, parametro_y, valores_y), grade = st.session_state["grade"]
+        escala_x = PARAMETROS_SENSIBILIDADE[parametro_x][4]
+        escala_y = PARAMETROS_SENSIBILIDADE[parametro_y][4]
+
+        def mapas():
+            return {
+                campo: renderizador().mapa_calor(
+                    np.array(valores_x) * escala_x, np.array(valores_y) * escala_y, grade[campo],
+                    titulo, nomes[parametro_x], nomes[parametro_y]
+                )
+                for campo, titulo in (("valor_final", "Valor Total Acumulado"), ("saque_mensal", "Saque Mensal Possível"))
+            }
+
+        graficos = memorizar("graficos_grade", st.session_state["grade"][0], mapas)
+        col1, col2 = st.columns(2)
+        for coluna, campo in ((col1, "valor_final"), (col2, "saque_mensal")):
+            with coluna:
+                st.image(graficos[campo], use_column_width=True)
 
     # Rodapé com informações
     st.markdown("---")
@@ -196,8 +283,6 @@ def main():
     </div>
     """, unsafe_allow_html=True)
 
+# streamlit run executa o arquivo como __main__; importar o módulo não monta a interface
 if __name__ == "__main__":
     main()
-
-# Executa a aplicação quando importada
-main()
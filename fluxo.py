@@ -0,0 +1,75 @@
+import json
+
+import numpy as np
+
+import motor
+
+# Tipo de conteúdo das respostas em streaming
+TIPO_NDJSON = "application/x-ndjson"
+
+# Meses por pedaço enviado em /calcular e cenários calculados por vez em /calcular/lote
+MESES_POR_PEDACO = 256
+CENARIOS_POR_BLOCO = 1024
+
+def _numero(valor):
+    """Converte NaN/infinito em None, que o JSON não representa"""
+    return valor if np.isfinite(valor) else None
+
+def linhas_serie(resumo: dict, saldo_acumulado, aportes_totais, saldo_acumulado_real=None, meses=None,
+                 meses_por_pedaco: int = MESES_POR_PEDACO):
+    """Gera a resposta de /calcular em NDJSON, um pedaço de meses por vez
+
+    A primeira linha traz o resumo; cada linha seguinte traz mes, saldo e
+    aportes (e saldo_real, quando há inflação); meses traz o mês de cada
+    ponto quando a série foi reamostrada. O gerador só formata o
+    próximo pedaço quando o servidor pede, então um cliente lento segura a
+    produção em vez de acumular memória.
+    """
+    yield (json.dumps(resumo) + "\n").encode()
+    if meses is None:
+        meses = np.arange(len(saldo_acumulado))
+    for inicio in range(0, len(saldo_acumulado), meses_por_pedaco):
+        fim = min(inicio + meses_por_pedaco, len(saldo_acumulado))
+        pedaco = zip(meses[inicio:fim].tolist(), saldo_acumulado[inicio:fim].tolist(), aportes_totais[inicio:fim].tolist())
+        if saldo_acumulado_real is None:
+            yield "".join(
+                f'{{"mes":{mes},"saldo":{saldo!r},"aportes":{aportes!r}}}\n'
+                for mes, saldo, aportes in pedaco
+            ).encode()
+        else:
+            yield "".join(
+                f'{{"mes":{mes},"saldo":{saldo!r},"aportes":{aportes!r},"saldo_real":{saldo_real!r}}}\n'
+                for (mes, saldo, aportes), saldo_real in zip(pedaco, saldo_acumulado_real[inicio:fim].tolist())
+            ).encode()
+
+def linhas_lote(entradas: dict, invalidos, erros: dict, incluir_series: bool = False,
+                cenarios_por_bloco: int = CENARIOS_POR_BLOCO):
+    """Gera a resposta de /calcular/lote em NDJSON, uma linha por cenário
+
+    Os cenários são calculados em blocos à medida que o cliente consome a
+    resposta, então a memória depende do tamanho do bloco e não do lote.
+    """
+    campos = ("valor_final", "total_investido", "rendimentos", "saque_mensal", "valor_final_real", "saque_mensal_real")
+    tamanho = len(invalidos)
+    for inicio in range(0, tamanho, cenarios_por_bloco):
+        fim = min(inicio + cenarios_por_bloco, tamanho)
+        resultados = motor.calcular_lote(
+            **{campo: valores[inicio:fim] for campo, valores in entradas.items()},
+            incluir_series=incluir_series
+        )
+        colunas = {campo: resultados[campo].tolist() for campo in campos}
+        meses = resultados["meses"].tolist()
+
+        linhas = []
+        for posicao, indice in enumerate(range(inicio, fim)):
+            if invalidos[indice]:
+                linhas.append(json.dumps({"indice": indice, "erro": erros[indice]}))
+                continue
+            linha = {"indice": indice}
+            linha.update((campo, _numero(colunas[campo][posicao])) for campo in campos)
+            if incluir_series:
+                horizonte = meses[posicao] + 1
+                linha["saldo_acumulado"] = resultados["saldo_acumulado"][posicao, :horizonte].tolist()
+                linha["aportes_totais"] = resultados["aportes_totais"][posicao, :horizonte].tolist()
+            linhas.append(json.dumps(linha))
+        yield ("\n".join(linhas) + "\n").encode()
@@ -0,0 +1,167 @@
+import importlib.util
+import io
+import json
+
+import numpy as np
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+import fluxo
+
+# orjson, msgpack e pyarrow estão no requirements.txt; sem eles (num ambiente
+# montado à mão) as respostas caem no json padrão e os formatos binários somem
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# msgpack e pyarrow só são importados na primeira resposta binária: o
+# pyarrow sozinho custa dezenas de ms no cold start de cada instância
+MSGPACK_DISPONIVEL = importlib.util.find_spec("msgpack") is not None
+ARROW_DISPONIVEL = importlib.util.find_spec("pyarrow") is not None
+
+TIPO_JSON = "application/json"
+TIPO_MSGPACK = "application/msgpack"
+TIPO_NPY = "application/x-npy"
+TIPO_ARROW = "application/vnd.apache.arrow.stream"
+
+# Nomes alternativos aceitos no cabeçalho Accept
+SINONIMOS = {
+    "application/x-msgpack": TIPO_MSGPACK,
+    "application/vnd.apache.arrow.file": TIPO_ARROW,
+    "*/*": TIPO_JSON,
+    "application/*": TIPO_JSON,
+}
+
+class RespostaJSONRapida(Response):
+    """Resposta JSON gerada pelo orjson, que serializa arrays NumPy diretamente"""
+    media_type = TIPO_JSON
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+
+def _para_json(valor):
+    """Converte arrays e NaN para tipos do json padrão, quando o orjson não está instalado"""
+    if isinstance(valor, np.ndarray):
+        valor = valor.tolist()
+    if isinstance(valor, float) and not np.isfinite(valor):
+        return None
+    if isinstance(valor, list):
+        return [_para_json(item) for item in valor]
+    if isinstance(valor, dict):
+        return {chave: _para_json(item) for chave, item in valor.items()}
+    return valor
+
+def resposta_json(modelo, dados: dict):
+    """Monta a resposta JSON sem revalidar os dados contra o response_model
+
+    Os dados vêm do motor e já têm os tipos do modelo, então o modelo é
+    construído com model_construct (sem validação, mantendo os arrays
+    NumPy) e serializado pelo orjson; NaN vira null. Devolver uma Response
+    faz o FastAPI pular a validação e o jsonable_encoder.
+    """
+    instancia = modelo.model_construct(**{campo: dados.get(campo) for campo in modelo.model_fields})
+    conteudo = dict(instancia)
+    if orjson is None:
+        return JSONResponse(_para_json(conteudo))
+    return RespostaJSONRapida(conteudo)
+
+def tipos_disponiveis():
+    """Formatos que este processo consegue gerar, conforme as dependências instaladas"""
+    tipos = [TIPO_JSON, fluxo.TIPO_NDJSON, TIPO_NPY]
+    if MSGPACK_DISPONIVEL:
+        tipos.append(TIPO_MSGPACK)
+    if ARROW_DISPONIVEL:
+        tipos.append(TIPO_ARROW)
+    return tipos
+
+def negociar(accept: str):
+    """Escolhe o formato da resposta a partir do cabeçalho Accept
+
+    Retorna o tipo escolhido e os parâmetros da opção (por exemplo
+    dtype=float32). Sem Accept, a resposta é JSON; se nenhuma opção aceita
+    estiver disponível, responde 406.
+    """
+    if not accept:
+        return TIPO_JSON, {}
+
+    opcoes = []
+    for posicao, opcao in enumerate(accept.split(",")):
+        tipo, *parametros = [parte.strip() for parte in opcao.split(";")]
+        parametros = dict(parametro.split("=", 1) for parametro in parametros if "=" in parametro)
+        try:
+            peso = float(parametros.pop("q", 1))
+        except ValueError:
+            peso = 0.0
+        if peso > 0:
+            opcoes.append((-peso, posicao, SINONIMOS.get(tipo.lower(), tipo.lower()), parametros))
+
+    disponiveis = tipos_disponiveis()
+    for _, _, tipo, parametros in sorted(opcoes):
+        if tipo in disponiveis:
+            return tipo, parametros
+    raise HTTPException(status_code=406, detail=f"Formatos disponíveis: {', '.join(disponiveis)}")
+
+def _dtype(parametros: dict):
+    """float64 por padrão; dtype=float32 reduz o tamanho pela metade"""
+    return np.dtype("<f4") if parametros.get("dtype") == "float32" else np.dtype("<f8")
+
+def _cabecalho_npy(forma, dtype) -> bytes:
+    cabecalho = io.BytesIO()
+    np.lib.format.write_array_header_1_0(cabecalho, {"descr": dtype.str, "fortran_order": False, "shape": forma})
+    return cabecalho.getvalue()
+
+def resposta_binaria(tipo: str, parametros: dict, escalares: dict, series: dict, detalhes: dict = None):
+    """Serializa escalares e séries de mesmo tamanho no formato negociado
+
+    detalhes traz dados auxiliares de tamanho variável (como os erros de um
+    lote), que vão no corpo do msgpack e nos metadados do Arrow mas ficam
+    fora dos cabeçalhos do x-npy.
+
+    As séries saem direto dos buffers dos arrays NumPy, sem passar por
+    listas Python:
+    - msgpack: mapa com os escalares e cada série como bin little-endian
+    - x-npy: um único .npy de forma (séries, pontos), com os nomes das
+      séries em X-Series e os escalares em JSON em X-Resumo
+    - Arrow IPC: tabela com uma coluna por série e os escalares nos metadados
+    """
+    dtype = _dtype(parametros)
+    arrays = {nome: np.ascontiguousarray(valores, dtype=dtype) for nome, valores in series.items()}
+
+    if tipo == TIPO_MSGPACK:
+        import msgpack
+
+        corpo = msgpack.packb({
+            **escalares,
+            **(detalhes or {}),
+            "dtype": dtype.str,
+            "series": {nome: memoryview(valores).cast("B") for nome, valores in arrays.items()},
+        })
+        return Response(corpo, media_type=TIPO_MSGPACK)
+
+    if tipo == TIPO_NPY:
+        pontos = len(next(iter(arrays.values()))) if arrays else 0
+
+        def pedacos():
+            yield _cabecalho_npy((len(arrays), pontos), dtype)
+            for valores in arrays.values():
+                yield memoryview(valores).cast("B")
+
+        return StreamingResponse(pedacos(), media_type=TIPO_NPY, headers={
+            "X-Series": ",".join(arrays),
+            "X-Resumo": json.dumps(escalares),
+        })
+
+    if tipo == TIPO_ARROW:
+        import pyarrow as pa
+
+        tabela = pa.table(
+            {nome: pa.array(valores) for nome, valores in arrays.items()},
+            metadata={"resumo": json.dumps({**escalares, **(detalhes or {})})}
+        )
+        destino = pa.BufferOutputStream()
+        with pa.ipc.new_stream(destino, tabela.schema) as escritor:
+            escritor.write_table(tabela)
+        return Response(memoryview(destino.getvalue()), media_type=TIPO_ARROW)
+
+    raise ValueError(f"Formato binário desconhecido: {tipo}")
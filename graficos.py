@@ -0,0 +1,148 @@
+import io
+import queue
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.ticker import FuncFormatter
+
+import motor
+
+FORMATOS = ("png", "svg")
+
+def formatar_eixo(valor, pos=None):
+    """Valores do eixo em R$, sem centavos"""
+    return f'R$ {valor:,.0f}'
+
+class RenderizadorGraficos:
+    """Gera os gráficos da calculadora em PNG ou SVG sem usar o pyplot
+
+    As figuras são criadas pela API orientada a objetos (Figure com canvas
+    Agg), então não dependem do estado global do pyplot nem do backend
+    configurado no processo. O gráfico de evolução reaproveita figuras de
+    um pool: cada thread pega uma figura livre, troca os dados das linhas
+    e a devolve. Os bytes gerados ficam num cache LRU chaveado pelas
+    entradas, e a mesma consulta não é renderizada de novo.
+    """
+
+    def __init__(self, tamanho_pool: int = 4, max_entradas: int = 128, dpi: int = 100):
+        self.tamanho_pool = tamanho_pool
+        self.max_entradas = max_entradas
+        self.dpi = dpi
+        self._pool = queue.LifoQueue()
+        self._criadas = 0
+        self._trava = threading.Lock()
+        self._cache = OrderedDict()
+        self.acertos = 0
+        self.renderizacoes = 0
+
+    def _nova_figura_evolucao(self):
+        fig = Figure(figsize=(10, 6))
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot()
+        saldo, = ax.plot([], [], label="Saldo Acumulado", color="#1f77b4", linewidth=2)
+        aportes, = ax.plot([], [], label="Total Investido", color="#2ca02c", linewidth=2)
+        area = ax.fill_between([], [], [], alpha=0.3, color="#1f77b4", label="Rendimentos")
+
+        ax.yaxis.set_major_formatter(FuncFormatter(formatar_eixo))
+        ax.grid(True, linestyle='--', alpha=0.7)
+        ax.set_title("Evolução do Patrimônio ao Longo do Tempo", pad=20)
+        ax.set_xlabel("Anos")
+        ax.set_ylabel("Valor (R$)")
+        ax.legend(loc="upper left")
+        return {"figura": fig, "eixo": ax, "saldo": saldo, "aportes": aportes, "area": area}
+
+    def _pegar_figura(self):
+        """Uma figura livre do pool; cria outra enquanto o pool não estiver cheio"""
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+        with self._trava:
+            criar = self._criadas < self.tamanho_pool
+            if criar:
+                self._criadas += 1
+        return self._nova_figura_evolucao() if criar else self._pool.get()
+
+    def _salvar(self, fig, formato: str) -> bytes:
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato de gráfico desconhecido: {formato}")
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=formato, dpi=self.dpi, bbox_inches="tight")
+        return buffer.getvalue()
+
+    def _em_cache(self, chave, renderizar) -> bytes:
+        with self._trava:
+            if chave in self._cache:
+                self._cache.move_to_end(chave)
+                self.acertos += 1
+                return self._cache[chave]
+        conteudo = renderizar()
+        with self._trava:
+            self.renderizacoes += 1
+            self._cache[chave] = conteudo
+            while len(self._cache) > self.max_entradas:
+                self._cache.popitem(last=False)
+        return conteudo
+
+    def evolucao(self, aporte_mensal: float, anos: int, taxa_retorno: float, formato: str = "png") -> bytes:
+        """Saldo acumulado e total investido mês a mês, com a área dos rendimentos"""
+        def renderizar():
+            saldo_acumulado, aportes_totais = motor.serie_acumulacao(aporte_mensal, anos, taxa_retorno)
+            tempo = np.arange(len(saldo_acumulado)) / 12
+
+            figura = self._pegar_figura()
+            try:
+                figura["saldo"].set_data(tempo, saldo_acumulado)
+                figura["aportes"].set_data(tempo, aportes_totais)
+                # A área não tem set_data no Matplotlib 3.8; é trocada por uma nova com o mesmo estilo
+                figura["area"].remove()
+                figura["area"] = figura["eixo"].fill_between(
+                    tempo, aportes_totais, saldo_acumulado, alpha=0.3, color="#1f77b4", label="Rendimentos"
+                )
+                figura["eixo"].relim()
+                figura["eixo"].autoscale_view()
+                return self._salvar(figura["figura"], formato)
+            finally:
+                self._pool.put(figura)
+
+        chave = ("evolucao", motor.VERSAO, float(aporte_mensal), int(anos), float(taxa_retorno), formato)
+        return self._em_cache(chave, renderizar)
+
+    def mapa_calor(self, valores_x, valores_y, valores, titulo: str, rotulo_x: str, rotulo_y: str,
+                   formato: str = "png") -> bytes:
+        """Mapa de calor de uma grade de sensibilidade, com barra de cores em R$
+
+        A forma da grade muda a cada consulta, então cada mapa usa uma
+        figura nova (ainda sem pyplot).
+        """
+        valores_x = np.asarray(valores_x, dtype=np.float64)
+        valores_y = np.asarray(valores_y, dtype=np.float64)
+        valores = np.ascontiguousarray(valores, dtype=np.float64)
+
+        def renderizar():
+            fig = Figure(figsize=(6, 5))
+            FigureCanvasAgg(fig)
+            ax = fig.add_subplot()
+            mapa = ax.pcolormesh(valores_x, valores_y, valores, shading="nearest", cmap="viridis")
+            fig.colorbar(mapa, ax=ax, format=FuncFormatter(formatar_eixo))
+            ax.set_title(titulo)
+            ax.set_xlabel(rotulo_x)
+            ax.set_ylabel(rotulo_y)
+            return self._salvar(fig, formato)
+
+        chave = (
+            "mapa_calor", titulo, rotulo_x, rotulo_y, formato,
+            valores_x.tobytes(), valores_y.tobytes(), valores.shape, valores.tobytes()
+        )
+        return self._em_cache(chave, renderizar)
+
+    def estatisticas(self) -> dict:
+        return {
+            "figuras": self._criadas,
+            "entradas": len(self._cache),
+            "acertos": self.acertos,
+            "renderizacoes": self.renderizacoes,
+        }
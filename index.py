@@ -1,14 +1,37 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
+from typing import Annotated, Literal, Optional
+import os
 import numpy as np
 
+import backtest
+import cache
+import fluxo
+import formatos
+import metricas
+import motor
+import metas
+import monte_carlo
+import perfil
+import resolucao
+import retirada
+from motor import validar_entrada
+
 app = FastAPI(title="Calculadora de Aposentadoria API")
+app.add_middleware(metricas.MiddlewareMetricas)
+if perfil.ATIVO:
+    app.add_middleware(perfil.MiddlewarePerfil)
 
 class AposentadoriaRequest(BaseModel):
     aporte_mensal: float
     anos: int
     taxa_retorno: float
     taxa_retirada: float
+    crescimento_aporte: float = 0.0
+    inflacao: float = 0.0
+    resolucao: Literal["mensal", "anual", "pontos"] = "mensal"
+    pontos: int = 100
 
 class AposentadoriaResponse(BaseModel):
     valor_final: float
@@ -17,42 +40,326 @@ class AposentadoriaResponse(BaseModel):
     saque_mensal: float
     saldo_acumulado: list[float]
     aportes_totais: list[float]
+    valor_final_real: Optional[float] = None
+    saque_mensal_real: Optional[float] = None
+    saldo_acumulado_real: Optional[list[float]] = None
+    meses: Optional[list[int]] = None
+
+class LoteRequest(BaseModel):
+    aporte_mensal: list[float]
+    anos: list[float]
+    taxa_retorno: list[float]
+    taxa_retirada: list[float]
+    crescimento_aporte: list[float] = [0.0]
+    inflacao: list[float] = [0.0]
+    incluir_series: bool = False
+
+class ErroLote(BaseModel):
+    indice: int
+    erro: str
+
+class LoteResponse(BaseModel):
+    valor_final: list[Optional[float]]
+    total_investido: list[Optional[float]]
+    rendimentos: list[Optional[float]]
+    saque_mensal: list[Optional[float]]
+    valor_final_real: list[Optional[float]]
+    saque_mensal_real: list[Optional[float]]
+    saldo_acumulado: Optional[list[Optional[list[float]]]] = None
+    aportes_totais: Optional[list[Optional[list[float]]]] = None
+    erros: list[ErroLote]
+
+class MonteCarloRequest(BaseModel):
+    aporte_mensal: float
+    anos: int
+    taxa_retorno: float
+    taxa_retirada: float
+    volatilidade: float = 0.15
+    caminhos: int = 10000
+    semente: Optional[int] = None
+    saque_mensal_desejado: Optional[float] = None
+
+class MonteCarloResponse(BaseModel):
+    percentis: dict[str, list[float]]
+    valor_final: dict[str, float]
+    valor_final_medio: float
+    valor_final_deterministico: float
+    meta: float
+    probabilidade_sucesso: float
+    caminhos: int
+    semente: int
+
+class FaixaParametro(BaseModel):
+    parametro: Literal["aporte_mensal", "anos", "taxa_retorno", "taxa_retirada"]
+    inicio: float
+    fim: float
+    passos: int = 11
+
+class SensibilidadeRequest(BaseModel):
+    aporte_mensal: float
+    anos: int
+    taxa_retorno: float
+    taxa_retirada: float
+    eixo_x: FaixaParametro
+    eixo_y: FaixaParametro
+
+class EixoGrade(BaseModel):
+    parametro: str
+    valores: list[float]
+
+class SensibilidadeResponse(BaseModel):
+    eixo_x: EixoGrade
+    eixo_y: EixoGrade
+    valor_final: list[list[float]]
+    saque_mensal: list[list[float]]
+
+class MetaAporteRequest(BaseModel):
+    saque_mensal_desejado: list[float]
+    anos: list[float]
+    taxa_retorno: list[float]
+    taxa_retirada: list[float]
+
+class MetaTaxaRetornoRequest(BaseModel):
+    saque_mensal_desejado: list[float]
+    aporte_mensal: list[float]
+    anos: list[float]
+    taxa_retirada: list[float]
+
+class MetaAnosRequest(BaseModel):
+    saque_mensal_desejado: list[float]
+    aporte_mensal: list[float]
+    taxa_retorno: list[float]
+    taxa_retirada: list[float]
+
+class MetaAporteResponse(BaseModel):
+    valor_necessario: list[Optional[float]]
+    aporte_mensal: list[Optional[float]]
+    erros: list[ErroLote]
+
+class MetaTaxaRetornoResponse(BaseModel):
+    valor_necessario: list[Optional[float]]
+    taxa_retorno: list[Optional[float]]
+    erros: list[ErroLote]
+
+class MetaAnosResponse(BaseModel):
+    valor_necessario: list[Optional[float]]
+    anos: list[Optional[int]]
+    erros: list[ErroLote]
+
+class RetiradaRequest(BaseModel):
+    aporte_mensal: float
+    anos: int
+    taxa_retorno: float
+    taxa_retirada: float
+    inflacao: float = 0.04
+    taxa_retorno_retirada: Optional[float] = None
+    anos_retirada: int = 40
+    reajuste: Literal["mensal", "anual"] = "mensal"
+
+class RetiradaResponse(BaseModel):
+    saldo_inicial: float
+    saque_mensal_inicial: float
+    mes_esgotamento: Optional[int]
+    anos_esgotamento: Optional[float]
+    saldo_retirada: list[float]
+    saques: list[float]
+
+class HistoricoRequest(BaseModel):
+    aporte_mensal: float
+    anos: int
+    taxa_retirada: float
+    carteira: Optional[dict[str, float]] = None
+    real: bool = False
+
+class ResumoHistorico(BaseModel):
+    minimo: float
+    p5: float
+    mediana: float
+    p95: float
+    maximo: float
+
+class HistoricoResponse(BaseModel):
+    datas_inicio: list[str]
+    valor_final: list[float]
+    saque_mensal: list[float]
+    total_investido: float
+    resumo: ResumoHistorico
+    pior_inicio: str
+    melhor_inicio: str
+
+# Faixas aceitas para cada parâmetro de entrada
+LIMITES = {
+    "aporte_mensal": (0, 1000000, "Aporte mensal"),
+    "anos": (1, 50, "Anos até aposentadoria"),
+    "taxa_retorno": (0.01, 0.20, "Taxa de retorno"),
+    "taxa_retirada": (0.01, 0.10, "Taxa de retirada"),
+    "saque_mensal_desejado": (0, 1000000, "Saque mensal desejado"),
+    "inflacao": (0, 0.30, "Inflação"),
+    "crescimento_aporte": (0, 0.30, "Crescimento anual do aporte"),
+    "pontos": (2, 601, "Pontos da série"),
+    "anos_retirada": (1, 60, "Anos de retirada"),
+}
+
+# Cache-Control do GET /calcular: um dia no navegador e um ano na CDN; a
+# ETag inclui a versão do motor e a borda é esvaziada a cada deploy
+CACHE_CONTROL_CALCULAR = os.environ.get(
+    "CACHE_CONTROL_CALCULAR", "public, max-age=86400, s-maxage=31536000, stale-while-revalidate=86400"
+)
+
+# Limite de pontos por eixo em /calcular/sensibilidade
+SENSIBILIDADE_MAX_PASSOS = 101
+
+# Limite de cenários por requisição em /calcular/lote
+LOTE_MAX_CENARIOS = 100000
+
+# Com incluir_series, cada cenário leva até 601 pontos por série e a resposta
+# JSON inteira fica em memória; lotes maiores com séries só em NDJSON
+LOTE_MAX_CENARIOS_SERIES = 2000
+
+# Limite de caminhos por requisição em /calcular/monte-carlo
+MONTE_CARLO_MAX_CAMINHOS = 1000000
+
+# A partir deste número de caminhos a simulação é distribuída entre processos
+MONTE_CARLO_MIN_CAMINHOS_PARALELO = 200000
+MONTE_CARLO_PROCESSOS = int(os.environ.get("MONTE_CARLO_PROCESSOS", "0")) or None
+MONTE_CARLO_THREADS = int(os.environ.get("MONTE_CARLO_THREADS", "1"))
+
+def validar_vetor(valores, min_valor, max_valor, nome_campo, erros):
+    """Valida um vetor de entradas, registrando em erros a primeira falha de cada linha"""
+    invalidos = ~((valores >= min_valor) & (valores <= max_valor))
+    for indice in np.flatnonzero(invalidos):
+        erros.setdefault(int(indice), f"{nome_campo} deve estar entre {min_valor} e {max_valor}")
+    return invalidos
+
+def validar_colunas(colunas: dict, erros: dict):
+    """Converte colunas de entrada em arrays do mesmo tamanho e as valida linha a linha
+
+    Colunas de tamanho 1 valem para todas as linhas. Retorna os arrays, com
+    valores neutros (o mínimo de cada faixa) nas linhas inválidas, e a
+    máscara dessas linhas.
+    """
+    tamanhos = {len(valores) for valores in colunas.values()} - {1}
+    if len(tamanhos) > 1:
+        raise ValueError("Os vetores de entrada devem ter o mesmo tamanho")
+    tamanho = tamanhos.pop() if tamanhos else 1
+    if tamanho > LOTE_MAX_CENARIOS:
+        raise ValueError(f"O lote deve ter no máximo {LOTE_MAX_CENARIOS} cenários")
 
-def validar_entrada(valor, min_valor, max_valor, nome_campo):
-    """Valida os valores de entrada"""
-    if not isinstance(valor, (int, float)):
-        raise ValueError(f"{nome_campo} deve ser um número")
-    if valor < min_valor or valor > max_valor:
-        raise ValueError(f"{nome_campo} deve estar entre {min_valor} e {max_valor}")
-    return valor
+    entradas = {}
+    invalidos = np.zeros(tamanho, dtype=bool)
+    for campo, valores in colunas.items():
+        valores = np.broadcast_to(np.asarray(valores, dtype=np.float64), (tamanho,))
+        invalidos |= validar_vetor(valores, *LIMITES[campo], erros)
+        if campo == "anos":
+            anos_fracionarios = ~invalidos & (valores != np.floor(valores))
+            for indice in np.flatnonzero(anos_fracionarios):
+                erros.setdefault(int(indice), "Anos até aposentadoria deve ser um número inteiro")
+            invalidos |= anos_fracionarios
+        entradas[campo] = valores
 
-def calcular_aposentadoria(aporte_mensal: float, anos: int, taxa_retorno: float, taxa_retirada: float):
-    """Calcula os valores da aposentadoria"""
+    # Linhas inválidas são calculadas com valores neutros e descartadas depois
+    entradas = {campo: np.where(invalidos, LIMITES[campo][0], valores) for campo, valores in entradas.items()}
+    if "anos" in entradas:
+        entradas["anos"] = entradas["anos"].astype(np.int64)
+    return entradas, invalidos
+
+def _coluna_lote(valores, invalidos):
+    """Converte um vetor de resultados em lista, com None nas linhas inválidas"""
+    coluna = valores.tolist()
+    for indice in np.flatnonzero(invalidos):
+        coluna[indice] = None
+    return coluna
+
+def _marcar_inatingiveis(resultado, invalidos, erros, mensagem):
+    """Registra como erro as linhas válidas cujo resultado não existe (NaN)"""
+    inatingiveis = ~invalidos & np.isnan(resultado)
+    for indice in np.flatnonzero(inatingiveis):
+        erros.setdefault(int(indice), mensagem)
+    return invalidos | inatingiveis
+
+def _erros_lote(erros):
+    """Lista os erros por linha na ordem dos índices"""
+    return [{"indice": indice, "erro": erro} for indice, erro in sorted(erros.items())]
+
+def _series_lote(matriz, meses, invalidos):
+    """Recorta cada linha da matriz de séries no horizonte do próprio cenário"""
+    return [
+        None if invalido else linha[:horizonte + 1].tolist()
+        for linha, horizonte, invalido in zip(matriz, meses.tolist(), invalidos.tolist())
+    ]
+
+def valores_faixa(faixa: FaixaParametro):
+    """Gera os pontos de um eixo da grade de sensibilidade, validando a faixa"""
+    min_valor, max_valor, nome_campo = LIMITES[faixa.parametro]
+    inicio = validar_entrada(faixa.inicio, min_valor, max_valor, nome_campo)
+    fim = validar_entrada(faixa.fim, min_valor, max_valor, nome_campo)
+    passos = validar_entrada(faixa.passos, 1, SENSIBILIDADE_MAX_PASSOS, "Passos")
+    valores = np.linspace(inicio, fim, passos)
+    if faixa.parametro == "anos":
+        # Anos são inteiros; passos que caem no mesmo ano são descartados
+        valores = np.unique(np.round(valores))
+    return valores
+
+def calcular_aposentadoria_arrays(aporte_mensal: float, anos: int, taxa_retorno: float, taxa_retirada: float,
+                                  crescimento_aporte: float = 0.0, inflacao: float = 0.0,
+                                  resolucao_series: str = "mensal", pontos: int = 100):
+    """motor.calcular_aposentadoria com as séries reduzidas à resolução pedida"""
+    resultados = motor.calcular_aposentadoria(
+        aporte_mensal, anos, taxa_retorno, taxa_retirada, crescimento_aporte, inflacao
+    )
+    saldo_acumulado = resultados["saldo_acumulado"]
+
+    if resolucao_series != "mensal":
+        # Mesmos índices para todas as séries, escolhidos sobre o saldo
+        indices = resolucao.indices_resolucao(len(saldo_acumulado), resolucao_series, pontos, saldo_acumulado)
+        for campo in ("saldo_acumulado", "aportes_totais", "saldo_acumulado_real"):
+            if campo in resultados:
+                resultados[campo] = resultados[campo][indices]
+        resultados["meses"] = indices
+
+    return resultados
+
+def calcular_aposentadoria_cache(**parametros):
+    """calcular_aposentadoria_arrays com cache LRU dos resultados
+
+    Os parâmetros são quantizados antes do cálculo, então o resultado
+    depende só da chave do cache. Com o cache em disco ativo, uma falha
+    no cache do processo consulta o banco compartilhado pelos workers
+    antes de calcular.
+    """
+    parametros = cache.normalizar(parametros)
+    chave = cache.chave("calcular", parametros)
+    resultados = cache.calculos.obter(chave)
+    if resultados is not None:
+        return resultados
+    if cache.disco is not None:
+        resultados = cache.disco.obter(chave)
+    if resultados is None:
+        resultados = calcular_aposentadoria_arrays(**parametros)
+        if cache.disco is not None:
+            cache.disco.guardar(chave, resultados)
+    cache.calculos.guardar(chave, resultados)
+    return resultados
+
+def calcular_aposentadoria(aporte_mensal: float, anos: int, taxa_retorno: float, taxa_retirada: float,
+                           crescimento_aporte: float = 0.0, inflacao: float = 0.0,
+                           resolucao_series: str = "mensal", pontos: int = 100):
+    """Calcula os valores da aposentadoria
+
+    Com crescimento_aporte o aporte é reajustado uma vez por ano; com
+    inflacao, os resultados também são devolvidos em valores de hoje.
+    Com resolucao_series "anual" ou "pontos" (LTTB) as séries são
+    reduzidas e meses indica o mês de cada ponto.
+    """
     try:
-        meses = anos * 12
-        taxa_mensal = (1 + taxa_retorno) ** (1/12) - 1
-        
-        saldo_acumulado = [0]
-        aportes_totais = [0]
-        
-        for mes in range(1, meses + 1):
-            saldo = saldo_acumulado[-1] * (1 + taxa_mensal) + aporte_mensal
-            saldo_acumulado.append(saldo)
-            aportes_totais.append(aporte_mensal * mes)
-        
-        valor_final = saldo_acumulado[-1]
-        total_investido = aportes_totais[-1]
-        rendimentos = valor_final - total_investido
-        saque_mensal = (valor_final * taxa_retirada) / 12
-        
-        return {
-            "valor_final": valor_final,
-            "total_investido": total_investido,
-            "rendimentos": rendimentos,
-            "saque_mensal": saque_mensal,
-            "saldo_acumulado": saldo_acumulado,
-            "aportes_totais": aportes_totais
-        }
+        resultados = calcular_aposentadoria_arrays(
+            aporte_mensal, anos, taxa_retorno, taxa_retirada, crescimento_aporte, inflacao,
+            resolucao_series, pontos
+        )
+        for campo in ("saldo_acumulado", "aportes_totais", "saldo_acumulado_real", "meses"):
+            if campo in resultados:
+                resultados[campo] = resultados[campo].tolist()
+        return resultados
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -65,30 +372,457 @@ async def root():
         "endpoints": {
             "/": "Informações da API",
             "/docs": "Documentação OpenAPI",
-            "/calcular": "Calcular aposentadoria (POST)"
+            "/calcular": "Calcular aposentadoria (POST, ou GET com parâmetros na query string e cacheável)",
+            "/calcular/lote": "Calcular vários cenários de uma vez (POST)",
+            "/calcular/monte-carlo": "Simulação de Monte Carlo com faixas de percentis (POST)",
+            "/calcular/sensibilidade": "Grade de valor final e saque para dois parâmetros (POST)",
+            "/calcular/retirada": "Fase de retirada e mês de esgotamento do patrimônio (POST)",
+            "/calcular/historico": "Backtest do plano em todas as janelas da série histórica (POST)",
+            "/cache": "Estatísticas do cache de resultados (GET)",
+            "/metrics": "Métricas no formato do Prometheus (GET)",
+            "/metas/aporte": "Aporte mensal necessário para um saque desejado (POST)",
+            "/metas/taxa-retorno": "Taxa de retorno necessária para um saque desejado (POST)",
+            "/metas/anos": "Anos necessários para um saque desejado (POST)"
         }
     }
 
-@app.post("/calcular", response_model=AposentadoriaResponse)
-async def calcular(request: AposentadoriaRequest):
-    """Calcula os valores da aposentadoria com base nos parâmetros fornecidos"""
+@metricas.registro.coletor
+def metricas_cache():
+    """Acertos, falhas e taxa de acerto dos caches de resultados, lidos na exportação"""
+    caches = {"memoria": cache.calculos}
+    if cache.disco is not None:
+        caches["disco"] = cache.disco
+    for nome, instancia in caches.items():
+        yield "cache_consultas_total", {"cache": nome, "resultado": "acerto"}, instancia.acertos
+        yield "cache_consultas_total", {"cache": nome, "resultado": "falha"}, instancia.falhas
+        consultas = instancia.acertos + instancia.falhas
+        yield "cache_taxa_acerto", {"cache": nome}, instancia.acertos / consultas if consultas else 0.0
+    yield "cache_bytes", {"cache": "memoria"}, cache.calculos.bytes
+
+metricas.registro.descrever("cache_consultas_total", "counter", "Consultas aos caches de resultados por desfecho")
+metricas.registro.descrever("cache_taxa_acerto", "gauge", "Fração das consultas respondidas pelo cache")
+metricas.registro.descrever("cache_bytes", "gauge", "Bytes ocupados pelo cache em memória")
+
+@app.get("/metrics")
+async def exportar_metricas():
+    """Métricas no formato de texto do Prometheus"""
+    return Response(metricas.registro.exportar(), media_type=metricas.TIPO_PROMETHEUS)
+
+@app.get("/cache")
+async def estatisticas_cache():
+    """Contadores de acertos, falhas e remoções do cache de resultados"""
+    estatisticas = cache.calculos.estatisticas()
+    estatisticas["disco"] = cache.disco.estatisticas() if cache.disco is not None else None
+    return estatisticas
+
+def responder_calculo(request: AposentadoriaRequest, requisicao: Request, cacheavel: bool = False):
+    """Valida, calcula e serializa /calcular no formato pedido pelo Accept
+
+    Com cacheavel, a resposta leva ETag forte e Cache-Control de longa
+    duração, e um If-None-Match com a mesma ETag recebe 304 sem calcular.
+    """
+    cronometro = metricas.registro.cronometro("/calcular")
     try:
         # Validar entradas
         aporte_mensal = validar_entrada(request.aporte_mensal, 0, 1000000, "Aporte mensal")
         anos = validar_entrada(request.anos, 1, 50, "Anos até aposentadoria")
         taxa_retorno = validar_entrada(request.taxa_retorno, 0.01, 0.20, "Taxa de retorno")
         taxa_retirada = validar_entrada(request.taxa_retirada, 0.01, 0.10, "Taxa de retirada")
+        crescimento_aporte = validar_entrada(request.crescimento_aporte, *LIMITES["crescimento_aporte"])
+        inflacao = validar_entrada(request.inflacao, *LIMITES["inflacao"])
+        pontos = validar_entrada(request.pontos, *LIMITES["pontos"])
         
+        tipo, parametros = formatos.negociar(requisicao.headers.get("accept"))
+        entradas = cache.normalizar({
+            "aporte_mensal": aporte_mensal,
+            "anos": anos,
+            "taxa_retorno": taxa_retorno,
+            "taxa_retirada": taxa_retirada,
+            "crescimento_aporte": crescimento_aporte,
+            "inflacao": inflacao,
+            "resolucao_series": request.resolucao,
+            "pontos": pontos
+        })
+
+        cronometro.etapa("validacao")
+
+        cabecalhos = {}
+        if cacheavel:
+            cabecalhos = {
+                "ETag": cache.etag(cache.chave("calcular", entradas), tipo, sorted(parametros.items())),
+                "Cache-Control": CACHE_CONTROL_CALCULAR,
+                "Vary": "Accept",
+            }
+            if cache.etag_corresponde(requisicao.headers.get("if-none-match"), cabecalhos["ETag"]):
+                return Response(status_code=304, headers=cabecalhos)
+
         # Calcular resultados
-        resultados = calcular_aposentadoria(
-            aporte_mensal=aporte_mensal,
-            anos=anos,
-            taxa_retorno=taxa_retorno,
-            taxa_retirada=taxa_retirada
-        )
+        resultados = calcular_aposentadoria_cache(**entradas)
+        cronometro.etapa("calculo")
+
+        if tipo == formatos.TIPO_JSON:
+            resposta = formatos.resposta_json(AposentadoriaResponse, resultados)
+        else:
+            series = {
+                campo: resultados.pop(campo)
+                for campo in ("saldo_acumulado", "aportes_totais", "saldo_acumulado_real", "meses")
+                if campo in resultados
+            }
+            if tipo == fluxo.TIPO_NDJSON:
+                resposta = StreamingResponse(fluxo.linhas_serie(
+                    resultados,
+                    series["saldo_acumulado"],
+                    series["aportes_totais"],
+                    series.get("saldo_acumulado_real"),
+                    series.get("meses")
+                ), media_type=fluxo.TIPO_NDJSON)
+            else:
+                resposta = formatos.resposta_binaria(tipo, parametros, resultados, series)
+        resposta.headers.update(cabecalhos)
+        # Em streaming, só a montagem da resposta; o envio do corpo entra no total
+        cronometro.etapa("serializacao")
+        return resposta
         
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Erro interno no servidor")
+
+@app.post("/calcular", response_model=AposentadoriaResponse)
+async def calcular(request: AposentadoriaRequest, requisicao: Request):
+    """Calcula os valores da aposentadoria com base nos parâmetros fornecidos
+
+    O formato segue o cabeçalho Accept: JSON (padrão), NDJSON em
+    streaming, msgpack, x-npy ou Arrow IPC.
+    """
+    return responder_calculo(request, requisicao)
+
+@app.get("/calcular", response_model=AposentadoriaResponse)
+async def calcular_get(request: Annotated[AposentadoriaRequest, Query()], requisicao: Request):
+    """Forma canônica e cacheável de /calcular, com os parâmetros na query string
+
+    O resultado é uma função pura das entradas, então a resposta pode ser
+    guardada pela CDN ou pelo proxy: leva ETag forte (entradas
+    normalizadas, versão do motor e formato) e Cache-Control longo, e
+    If-None-Match com a ETag atual recebe 304.
+    """
+    return responder_calculo(request, requisicao, cacheavel=True)
+
+@app.post("/calcular/lote", response_model=LoteResponse)
+async def calcular_lote(request: LoteRequest, requisicao: Request):
+    """Calcula vários cenários em uma única avaliação vetorizada
+
+    Linhas com entradas inválidas não interrompem o lote: recebem None nos
+    resultados e são descritas em erros. Com Accept: application/x-ndjson,
+    os cenários são calculados em blocos e enviados um por linha; msgpack,
+    x-npy e Arrow IPC trazem os resultados por cenário em colunas. Em
+    JSON, incluir_series vale para até LOTE_MAX_CENARIOS_SERIES cenários.
+    """
+    cronometro = metricas.registro.cronometro("/calcular/lote")
+    try:
+        # Validar entradas linha a linha
+        erros = {}
+        entradas, invalidos = validar_colunas({
+            "aporte_mensal": request.aporte_mensal,
+            "anos": request.anos,
+            "taxa_retorno": request.taxa_retorno,
+            "taxa_retirada": request.taxa_retirada,
+            "crescimento_aporte": request.crescimento_aporte,
+            "inflacao": request.inflacao,
+        }, erros)
+
+        tipo, parametros = formatos.negociar(requisicao.headers.get("accept"))
+        if request.incluir_series and tipo == formatos.TIPO_JSON and len(invalidos) > LOTE_MAX_CENARIOS_SERIES:
+            raise ValueError(
+                f"Com incluir_series, o lote deve ter no máximo {LOTE_MAX_CENARIOS_SERIES} cenários; "
+                f"para lotes maiores use Accept: {fluxo.TIPO_NDJSON}"
+            )
+        cronometro.etapa("validacao")
+        if tipo == fluxo.TIPO_NDJSON:
+            return StreamingResponse(
+                fluxo.linhas_lote(entradas, invalidos, erros, request.incluir_series),
+                media_type=fluxo.TIPO_NDJSON
+            )
+
+        # Linhas inválidas ficam NaN, que vira null no JSON
+        resultados = motor.calcular_lote(**entradas, incluir_series=request.incluir_series and tipo == formatos.TIPO_JSON)
+        colunas = {
+            campo: np.where(invalidos, np.nan, resultados[campo])
+            for campo in ("valor_final", "total_investido", "rendimentos", "saque_mensal", "valor_final_real", "saque_mensal_real")
+        }
+        cronometro.etapa("calculo")
+
+        if tipo != formatos.TIPO_JSON:
+            # Nos formatos binários as séries não são enviadas, só as colunas por cenário
+            resposta = formatos.resposta_binaria(
+                tipo, parametros, {"cenarios": len(invalidos)}, colunas, {"erros": _erros_lote(erros)}
+            )
+        else:
+            resposta = dict(colunas)
+            if request.incluir_series:
+                resposta["saldo_acumulado"] = _series_lote(resultados["saldo_acumulado"], resultados["meses"], invalidos)
+                resposta["aportes_totais"] = _series_lote(resultados["aportes_totais"], resultados["meses"], invalidos)
+            resposta["erros"] = _erros_lote(erros)
+            resposta = formatos.resposta_json(LoteResponse, resposta)
+
+        cronometro.etapa("serializacao")
+        return resposta
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Erro interno no servidor")
+
+# Sem async: a simulação leva segundos de CPU e roda no threadpool do
+# FastAPI, em vez de parar o event loop e as outras requisições
+@app.post("/calcular/monte-carlo", response_model=MonteCarloResponse)
+def calcular_monte_carlo(request: MonteCarloRequest):
+    """Simula retornos estocásticos e devolve faixas P5/P50/P95 e probabilidade de sucesso"""
+    try:
+        # Validar entradas
+        aporte_mensal = validar_entrada(request.aporte_mensal, 0, 1000000, "Aporte mensal")
+        anos = validar_entrada(request.anos, 1, 50, "Anos até aposentadoria")
+        taxa_retorno = validar_entrada(request.taxa_retorno, 0.01, 0.20, "Taxa de retorno")
+        taxa_retirada = validar_entrada(request.taxa_retirada, 0.01, 0.10, "Taxa de retirada")
+        volatilidade = validar_entrada(request.volatilidade, 0.01, 0.60, "Volatilidade")
+        caminhos = validar_entrada(request.caminhos, 1, MONTE_CARLO_MAX_CAMINHOS, "Caminhos")
+
+        meta = None
+        if request.saque_mensal_desejado is not None:
+            saque_desejado = validar_entrada(request.saque_mensal_desejado, 0, 1000000, "Saque mensal desejado")
+            meta = saque_desejado * 12 / taxa_retirada
+
+        # Sem semente, sorteia uma e a devolve para que o resultado possa ser reproduzido
+        semente = request.semente
+        if semente is None:
+            semente = int(np.random.SeedSequence().entropy % 2**63)
+
+        if caminhos >= MONTE_CARLO_MIN_CAMINHOS_PARALELO:
+            resultados = monte_carlo.simular_paralelo(
+                aporte_mensal=aporte_mensal,
+                anos=anos,
+                taxa_retorno=taxa_retorno,
+                volatilidade=volatilidade,
+                caminhos=caminhos,
+                semente=semente,
+                meta=meta,
+                processos=MONTE_CARLO_PROCESSOS,
+                threads=MONTE_CARLO_THREADS
+            )
+        else:
+            resultados = monte_carlo.simular(
+                aporte_mensal=aporte_mensal,
+                anos=anos,
+                taxa_retorno=taxa_retorno,
+                volatilidade=volatilidade,
+                caminhos=caminhos,
+                semente=semente,
+                meta=meta
+            )
+        resultados["percentis"] = {nome: serie.tolist() for nome, serie in resultados["percentis"].items()}
+        resultados["semente"] = semente
+
         return resultados
-        
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Erro interno no servidor")
+
+@app.post("/calcular/sensibilidade", response_model=SensibilidadeResponse)
+async def calcular_sensibilidade(request: SensibilidadeRequest):
+    """Calcula a grade de valor_final e saque_mensal variando dois parâmetros"""
+    try:
+        # Validar entradas
+        base = {
+            parametro: validar_entrada(getattr(request, parametro), *LIMITES[parametro])
+            for parametro in motor.PARAMETROS_GRADE
+        }
+        valores_x = valores_faixa(request.eixo_x)
+        valores_y = valores_faixa(request.eixo_y)
+
+        grade = motor.grade_sensibilidade(
+            base,
+            request.eixo_x.parametro, valores_x,
+            request.eixo_y.parametro, valores_y
+        )
+
+        return {
+            "eixo_x": {"parametro": request.eixo_x.parametro, "valores": valores_x.tolist()},
+            "eixo_y": {"parametro": request.eixo_y.parametro, "valores": valores_y.tolist()},
+            "valor_final": grade["valor_final"].tolist(),
+            "saque_mensal": grade["saque_mensal"].tolist()
+        }
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Erro interno no servidor")
+
+@app.post("/metas/aporte", response_model=MetaAporteResponse)
+async def meta_aporte(request: MetaAporteRequest):
+    """Calcula, em forma fechada, o aporte mensal que sustenta o saque desejado"""
+    try:
+        erros = {}
+        entradas, invalidos = validar_colunas({
+            "saque_mensal_desejado": request.saque_mensal_desejado,
+            "anos": request.anos,
+            "taxa_retorno": request.taxa_retorno,
+            "taxa_retirada": request.taxa_retirada,
+        }, erros)
+
+        valor_necessario = metas.valor_necessario(entradas["saque_mensal_desejado"], entradas["taxa_retirada"])
+        aporte_mensal = metas.aporte_necessario(valor_necessario, entradas["anos"], entradas["taxa_retorno"])
+
+        return {
+            "valor_necessario": _coluna_lote(valor_necessario, invalidos),
+            "aporte_mensal": _coluna_lote(aporte_mensal, invalidos),
+            "erros": _erros_lote(erros)
+        }
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Erro interno no servidor")
+
+@app.post("/metas/taxa-retorno", response_model=MetaTaxaRetornoResponse)
+async def meta_taxa_retorno(request: MetaTaxaRetornoRequest):
+    """Resolve a menor taxa de retorno anual que sustenta o saque desejado"""
+    try:
+        erros = {}
+        entradas, invalidos = validar_colunas({
+            "saque_mensal_desejado": request.saque_mensal_desejado,
+            "aporte_mensal": request.aporte_mensal,
+            "anos": request.anos,
+            "taxa_retirada": request.taxa_retirada,
+        }, erros)
+
+        valor_necessario = metas.valor_necessario(entradas["saque_mensal_desejado"], entradas["taxa_retirada"])
+        taxa_retorno = metas.taxa_necessaria(valor_necessario, entradas["aporte_mensal"], entradas["anos"])
+        invalidos = _marcar_inatingiveis(taxa_retorno, invalidos, erros, "Meta inatingível com taxa de retorno de até 100% ao ano")
+
+        return {
+            "valor_necessario": _coluna_lote(valor_necessario, invalidos),
+            "taxa_retorno": _coluna_lote(taxa_retorno, invalidos),
+            "erros": _erros_lote(erros)
+        }
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Erro interno no servidor")
+
+@app.post("/metas/anos", response_model=MetaAnosResponse)
+async def meta_anos(request: MetaAnosRequest):
+    """Calcula o menor número de anos de aportes que sustenta o saque desejado"""
+    try:
+        erros = {}
+        entradas, invalidos = validar_colunas({
+            "saque_mensal_desejado": request.saque_mensal_desejado,
+            "aporte_mensal": request.aporte_mensal,
+            "taxa_retorno": request.taxa_retorno,
+            "taxa_retirada": request.taxa_retirada,
+        }, erros)
+
+        valor_necessario = metas.valor_necessario(entradas["saque_mensal_desejado"], entradas["taxa_retirada"])
+        anos = metas.anos_necessarios(valor_necessario, entradas["aporte_mensal"], entradas["taxa_retorno"])
+        invalidos = _marcar_inatingiveis(anos, invalidos, erros, "Meta inatingível sem aporte mensal")
+
+        return {
+            "valor_necessario": _coluna_lote(valor_necessario, invalidos),
+            "anos": _coluna_lote(np.nan_to_num(anos).astype(np.int64), invalidos),
+            "erros": _erros_lote(erros)
+        }
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Erro interno no servidor")
+
+@app.post("/calcular/retirada", response_model=RetiradaResponse)
+async def calcular_retirada(request: RetiradaRequest):
+    """Simula a fase de retirada a partir do saldo acumulado, com saques corrigidos pela inflação
+
+    Com reajuste mensal o saldo e o mês de esgotamento vêm da forma fechada;
+    com reajuste anual a retirada é simulada mês a mês e o esgotamento só é
+    informado se ocorrer dentro de anos_retirada.
+    """
+    try:
+        # Validar entradas
+        aporte_mensal = validar_entrada(request.aporte_mensal, *LIMITES["aporte_mensal"])
+        anos = validar_entrada(request.anos, *LIMITES["anos"])
+        taxa_retorno = validar_entrada(request.taxa_retorno, *LIMITES["taxa_retorno"])
+        taxa_retirada = validar_entrada(request.taxa_retirada, *LIMITES["taxa_retirada"])
+        inflacao = validar_entrada(request.inflacao, *LIMITES["inflacao"])
+        anos_retirada = validar_entrada(request.anos_retirada, *LIMITES["anos_retirada"])
+        taxa_retorno_retirada = taxa_retorno
+        if request.taxa_retorno_retirada is not None:
+            taxa_retorno_retirada = validar_entrada(request.taxa_retorno_retirada, 0, 0.20, "Taxa de retorno na retirada")
+
+        saldo_inicial = motor.valor_final(aporte_mensal, anos, taxa_retorno)
+        saque_inicial = (saldo_inicial * taxa_retirada) / 12
+
+        if request.reajuste == "mensal":
+            saldos, saques, esgotamento = retirada.serie_retirada(
+                saldo_inicial, saque_inicial, taxa_retorno_retirada, inflacao, anos_retirada
+            )
+        else:
+            taxas_mensais = np.full((1, anos_retirada * 12), motor.taxa_mensal_equivalente(taxa_retorno_retirada))
+            saldos, saques, esgotamento = retirada.simular_retirada_passos(
+                saldo_inicial, saque_inicial, taxas_mensais, inflacao, reajuste="anual"
+            )
+            saldos, saques, esgotamento = saldos[0], saques[0], float(esgotamento[0])
+
+        perpetuo = not np.isfinite(esgotamento)
+        return {
+            "saldo_inicial": saldo_inicial,
+            "saque_mensal_inicial": saque_inicial,
+            "mes_esgotamento": None if perpetuo else int(esgotamento),
+            "anos_esgotamento": None if perpetuo else esgotamento / 12,
+            "saldo_retirada": saldos.tolist(),
+            "saques": saques.tolist()
+        }
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Erro interno no servidor")
+
+@app.post("/calcular/historico", response_model=HistoricoResponse)
+async def calcular_historico(request: HistoricoRequest):
+    """Mostra como o plano teria terminado começando em cada mês da série histórica"""
+    try:
+        # Validar entradas
+        aporte_mensal = validar_entrada(request.aporte_mensal, *LIMITES["aporte_mensal"])
+        anos = validar_entrada(request.anos, *LIMITES["anos"])
+        taxa_retirada = validar_entrada(request.taxa_retirada, *LIMITES["taxa_retirada"])
+
+        try:
+            serie = backtest.carregar_serie()
+        except FileNotFoundError:
+            raise HTTPException(status_code=503, detail="Série histórica indisponível")
+
+        carteira = request.carteira or {serie.ativos[0]: 1.0}
+        resultados = backtest.backtest(serie, aporte_mensal, anos, taxa_retirada, carteira, request.real)
+
+        valor_final = resultados["valor_final"]
+        minimo, p5, mediana, p95, maximo = np.percentile(valor_final, [0, 5, 50, 95, 100])
+        return {
+            "datas_inicio": resultados["datas_inicio"],
+            "valor_final": valor_final.tolist(),
+            "saque_mensal": resultados["saque_mensal"].tolist(),
+            "total_investido": resultados["total_investido"],
+            "resumo": {"minimo": minimo, "p5": p5, "mediana": mediana, "p95": p95, "maximo": maximo},
+            "pior_inicio": resultados["datas_inicio"][int(np.argmin(valor_final))],
+            "melhor_inicio": resultados["datas_inicio"][int(np.argmax(valor_final))]
+        }
+
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
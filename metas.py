@@ -0,0 +1,88 @@
+import numpy as np
+
+import motor
+
+def valor_necessario(saque_desejado, taxa_retirada):
+    """Patrimônio que sustenta o saque mensal desejado à taxa de retirada anual"""
+    return np.asarray(saque_desejado, dtype=np.float64) * 12 / np.asarray(taxa_retirada, dtype=np.float64)
+
+def aporte_necessario(valor_alvo, anos, taxa_retorno):
+    """Aporte mensal que acumula valor_alvo no horizonte, em forma fechada"""
+    taxa_mensal = (1 + np.asarray(taxa_retorno, dtype=np.float64)) ** (1/12) - 1
+    meses = np.asarray(anos, dtype=np.float64) * 12
+    return np.asarray(valor_alvo, dtype=np.float64) / motor.fatores_acumulacao(taxa_mensal, meses)
+
+def anos_necessarios(valor_alvo, aporte_mensal, taxa_retorno):
+    """Menor número inteiro de anos para acumular valor_alvo
+
+    Invertendo aporte * ((1 + i)^n - 1) / i = V, n = log(1 + V * i / aporte) / log(1 + i).
+    Metas inatingíveis (aporte nulo com alvo positivo) resultam em NaN.
+    """
+    valor_alvo, aporte_mensal, taxa_retorno = np.broadcast_arrays(
+        np.asarray(valor_alvo, dtype=np.float64),
+        np.asarray(aporte_mensal, dtype=np.float64),
+        np.asarray(taxa_retorno, dtype=np.float64),
+    )
+    taxa_mensal = (1 + taxa_retorno) ** (1/12) - 1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fator_alvo = valor_alvo / aporte_mensal
+        meses = np.where(
+            taxa_mensal == 0,
+            fator_alvo,
+            np.log1p(fator_alvo * taxa_mensal) / np.log1p(np.where(taxa_mensal == 0, 1.0, taxa_mensal))
+        )
+    meses = np.where(valor_alvo <= 0, 0.0, meses)
+    # Tolerância para que arredondamentos não acrescentem um ano inteiro
+    anos = np.ceil(meses / 12 - 1e-9)
+    return np.where(np.isfinite(anos), np.maximum(anos, 1), np.nan)
+
+def taxa_necessaria(valor_alvo, aporte_mensal, anos, taxa_maxima: float = 1.0,
+                    iteracoes: int = 100, tolerancia: float = 1e-13):
+    """Menor taxa de retorno anual que acumula valor_alvo, para vários alvos de uma vez
+
+    Usa Newton com salvaguarda de bissecção sobre a taxa mensal, mantendo um
+    intervalo [baixo, alto] que contém a raiz em cada linha. Se os aportes
+    sem rendimento já bastam a taxa é 0; se nem taxa_maxima basta, NaN.
+    """
+    valor_alvo, aporte_mensal, anos = np.broadcast_arrays(
+        np.asarray(valor_alvo, dtype=np.float64),
+        np.asarray(aporte_mensal, dtype=np.float64),
+        np.asarray(anos, dtype=np.float64),
+    )
+    meses = anos * 12
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fator_alvo = valor_alvo / aporte_mensal
+
+    baixo = np.zeros_like(fator_alvo)
+    alto = np.full_like(fator_alvo, (1 + taxa_maxima) ** (1/12) - 1)
+    sem_rendimento = fator_alvo <= meses
+    inatingivel = ~sem_rendimento & ~(fator_alvo <= motor.fatores_acumulacao(alto, meses))
+    ativo = ~sem_rendimento & ~inatingivel
+
+    # Chute inicial pela aproximação de segunda ordem F(i) ~ n * (1 + (n - 1) * i / 2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        taxa = 2 * (fator_alvo / meses - 1) / np.maximum(meses - 1, 1)
+    taxa = np.where(ativo, np.clip(taxa, alto * 1e-6, alto * 0.5), alto * 0.5)
+
+    for _ in range(iteracoes):
+        if not ativo.any():
+            break
+        fator = motor.fatores_acumulacao(taxa, meses)
+        erro = fator - fator_alvo
+        baixo = np.where(ativo & (erro < 0), taxa, baixo)
+        alto = np.where(ativo & (erro > 0), taxa, alto)
+
+        # F'(i) = (n * (1 + i)^(n - 1) - F(i)) / i
+        derivada = (meses * np.exp((meses - 1) * np.log1p(taxa)) - fator) / taxa
+        with np.errstate(divide="ignore", invalid="ignore"):
+            proxima = taxa - erro / derivada
+        fora = ~np.isfinite(proxima) | (proxima <= baixo) | (proxima >= alto)
+        proxima = np.where(fora, (baixo + alto) / 2, proxima)
+
+        convergiu = np.abs(proxima - taxa) <= tolerancia * np.maximum(taxa, 1e-12)
+        taxa = np.where(ativo, proxima, taxa)
+        ativo &= ~convergiu
+
+    taxa_anual = (1 + taxa) ** 12 - 1
+    taxa_anual = np.where(sem_rendimento, 0.0, taxa_anual)
+    return np.where(inatingivel, np.nan, taxa_anual)
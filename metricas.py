@@ -0,0 +1,185 @@
+import bisect
+import threading
+import time
+
+# Limites (em segundos) dos baldes dos histogramas de latência
+LIMITES_LATENCIA = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+TIPO_PROMETHEUS = "text/plain; version=0.0.4; charset=utf-8"
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _rotulos(rotulos) -> str:
+    if not rotulos:
+        return ""
+    return "{" + ",".join(f'{nome}="{_escapar(valor)}"' for nome, valor in rotulos) + "}"
+
+def _numero(valor) -> str:
+    valor = float(valor)
+    return str(int(valor)) if valor.is_integer() else repr(valor)
+
+class Metricas:
+    """Contadores e histogramas no formato de texto do Prometheus
+
+    Cada thread grava num fragmento próprio (dicts em threading.local), então
+    registrar uma métrica não disputa trava nenhuma; a trava só é usada na
+    primeira gravação de cada thread e na exportação, que soma os
+    fragmentos. Métricas calculadas na hora da exportação (como as taxas de
+    acerto dos caches) vêm de coletores registrados.
+    """
+
+    def __init__(self, prefixo: str = "calculadora", limites=LIMITES_LATENCIA):
+        self.prefixo = prefixo
+        self.limites = tuple(limites)
+        self._descricoes = {}
+        self._fragmentos = []
+        self._coletores = []
+        self._local = threading.local()
+        self._trava = threading.Lock()
+
+    def descrever(self, nome: str, tipo: str, ajuda: str):
+        """Registra o tipo (counter, gauge, histogram) e o texto de ajuda de uma métrica"""
+        self._descricoes[nome] = (tipo, ajuda)
+
+    def coletor(self, funcao):
+        """Registra uma função que devolve (nome, rótulos, valor) no momento da exportação"""
+        self._coletores.append(funcao)
+        return funcao
+
+    def _fragmento(self):
+        fragmento = getattr(self._local, "fragmento", None)
+        if fragmento is None:
+            fragmento = self._local.fragmento = ({}, {})
+            with self._trava:
+                self._fragmentos.append(fragmento)
+        return fragmento
+
+    def somar(self, nome: str, valor: float = 1, **rotulos):
+        """Soma valor a um contador (ou a um gauge, com valor negativo para descer)"""
+        contadores = self._fragmento()[0]
+        chave = (nome, tuple(rotulos.items()))
+        contadores[chave] = contadores.get(chave, 0) + valor
+
+    def observar(self, nome: str, valor: float, **rotulos):
+        """Registra uma observação num histograma"""
+        histogramas = self._fragmento()[1]
+        chave = (nome, tuple(rotulos.items()))
+        baldes = histogramas.get(chave)
+        if baldes is None:
+            # Um contador por balde (não acumulado), o do +Inf e a soma no fim
+            baldes = histogramas[chave] = [0] * (len(self.limites) + 1) + [0.0]
+        baldes[bisect.bisect_left(self.limites, valor)] += 1
+        baldes[-1] += valor
+
+    def cronometro(self, rota: str):
+        return Cronometro(self, rota)
+
+    def _somar_fragmentos(self):
+        with self._trava:
+            fragmentos = list(self._fragmentos)
+        contadores, histogramas = {}, {}
+        for fragmento_contadores, fragmento_histogramas in fragmentos:
+            # dict() copia de uma vez, sem o dict mudar de tamanho no meio da iteração
+            for chave, valor in dict(fragmento_contadores).items():
+                contadores[chave] = contadores.get(chave, 0) + valor
+            for chave, baldes in dict(fragmento_histogramas).items():
+                total = histogramas.setdefault(chave, [0] * len(baldes))
+                for posicao, valor in enumerate(list(baldes)):
+                    total[posicao] += valor
+        return contadores, histogramas
+
+    def exportar(self) -> str:
+        """Texto no formato de exposição do Prometheus (versão 0.0.4)"""
+        contadores, histogramas = self._somar_fragmentos()
+        for coletor in self._coletores:
+            for nome, rotulos, valor in coletor():
+                contadores[(nome, tuple(rotulos.items()))] = valor
+
+        # Linhas agrupadas por conjunto de rótulos: só os grupos são ordenados,
+        # porque os buckets de um histograma precisam sair em ordem crescente
+        # de le, seguidos do _sum e do _count
+        series = {}
+        for (nome, rotulos), valor in contadores.items():
+            series.setdefault(nome, {})[rotulos] = [f"{self.prefixo}_{nome}{_rotulos(rotulos)} {_numero(valor)}"]
+        for (nome, rotulos), baldes in histogramas.items():
+            linhas = series.setdefault(nome, {}).setdefault(rotulos, [])
+            acumulado = 0
+            for limite, quantidade in zip(self.limites + ("+Inf",), baldes[:-1]):
+                acumulado += quantidade
+                linhas.append(f"{self.prefixo}_{nome}_bucket{_rotulos(rotulos + (('le', limite),))} {acumulado}")
+            linhas.append(f"{self.prefixo}_{nome}_sum{_rotulos(rotulos)} {baldes[-1]!r}")
+            linhas.append(f"{self.prefixo}_{nome}_count{_rotulos(rotulos)} {acumulado}")
+
+        saida = []
+        for nome in sorted(series):
+            tipo, ajuda = self._descricoes.get(nome, ("untyped", nome))
+            saida.append(f"# HELP {self.prefixo}_{nome} {ajuda}")
+            saida.append(f"# TYPE {self.prefixo}_{nome} {tipo}")
+            for rotulos in sorted(series[nome], key=_rotulos):
+                saida.extend(series[nome][rotulos])
+        return "\n".join(saida) + "\n"
+
+class Cronometro:
+    """Mede etapas consecutivas de uma requisição: cada etapa conta desde a anterior"""
+    __slots__ = ("metricas", "rota", "ultimo")
+
+    def __init__(self, metricas: Metricas, rota: str):
+        self.metricas = metricas
+        self.rota = rota
+        self.ultimo = time.perf_counter()
+
+    def etapa(self, nome: str):
+        agora = time.perf_counter()
+        self.metricas.observar("latencia_segundos", agora - self.ultimo, rota=self.rota, etapa=nome)
+        self.ultimo = agora
+
+class MiddlewareMetricas:
+    """Middleware ASGI que conta requisições, erros e requisições em andamento
+
+    A latência total vai para o mesmo histograma das etapas, com
+    etapa="total", e inclui o envio do corpo em respostas em streaming.
+    A rota é o modelo do caminho (como /calcular), não o caminho pedido,
+    para que caminhos desconhecidos não criem uma série por URL.
+    """
+
+    def __init__(self, app, metricas: "Metricas" = None):
+        self.app = app
+        self.metricas = metricas or registro
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        inicio = time.perf_counter()
+        status = [500]
+
+        async def enviar(mensagem):
+            if mensagem["type"] == "http.response.start":
+                status[0] = mensagem["status"]
+            await send(mensagem)
+
+        metricas = self.metricas
+        metricas.somar("requisicoes_em_andamento", 1)
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            metricas.somar("requisicoes_em_andamento", -1)
+            rota = getattr(scope.get("route"), "path", None) or "desconhecida"
+            metricas.somar("requisicoes_total", rota=rota, metodo=scope["method"], status=status[0])
+            if status[0] >= 400:
+                metricas.somar("erros_total", rota=rota, status=status[0])
+            metricas.observar("latencia_segundos", time.perf_counter() - inicio, rota=rota, etapa="total")
+
+# Registro do processo, compartilhado pelas aplicações
+registro = Metricas()
+registro.descrever("requisicoes_total", "counter", "Requisições atendidas por rota, método e status")
+registro.descrever("erros_total", "counter", "Respostas com status 4xx ou 5xx por rota e status")
+registro.descrever("requisicoes_em_andamento", "gauge", "Requisições sendo atendidas agora")
+registro.descrever(
+    "latencia_segundos", "histogram",
+    "Latência por rota e etapa (validacao, calculo, serializacao e total)"
+)
@@ -0,0 +1,234 @@
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+import motor
+
+# Percentis devolvidos nas faixas de resultado
+PERCENTIS = (5, 50, 95)
+
+# Caminhos gerados e reduzidos por vez; a matriz completa nunca fica em memória
+TAMANHO_BLOCO = 4096
+
+# Histograma do log da razão entre o saldo simulado e o determinístico,
+# usado para obter os percentis mês a mês sem guardar os caminhos. A faixa
+# de cada mês cobre HISTOGRAMA_DESVIOS desvios do log-retorno acumulado até
+# ele, mais o desvio da mediana, então cresce com a volatilidade e o prazo
+HISTOGRAMA_DESVIOS = 6.0
+HISTOGRAMA_MARGEM = 0.01
+HISTOGRAMA_CLASSES = 4096
+
+def parametros_lognormais(taxa_retorno: float, volatilidade: float):
+    """Média e desvio mensais do log-retorno para uma taxa anual esperada e uma volatilidade anual"""
+    desvio_mensal = volatilidade / np.sqrt(12)
+    # Ajuste de convexidade: E[exp(X)] reproduz a taxa mensal equivalente
+    media_mensal = np.log1p(taxa_retorno) / 12 - desvio_mensal ** 2 / 2
+    return media_mensal, desvio_mensal
+
+def saldos_caminhos(log_retornos, aporte_mensal: float):
+    """Saldos de cada caminho mês a mês, sem laço sobre os meses
+
+    Com L_t = soma dos log-retornos até t, o saldo com aporte no fim do mês é
+    aporte * exp(L_t) * soma_{k<=t} exp(-L_k).
+    """
+    acumulado = np.cumsum(log_retornos, axis=1)
+    return aporte_mensal * np.exp(acumulado) * np.cumsum(np.exp(-acumulado), axis=1)
+
+def limites_histograma(meses: int, desvio_mensal: float):
+    """Limites inferior e superior do log da razão em cada mês da simulação
+
+    O saldo é uma média ponderada de aportes que rendem exp(L_t - L_k), então
+    o log da razão fica dentro da faixa dos log-retornos acumulados: desvio
+    desvio_mensal * sqrt(t) em torno de uma mediana desvio² t / 2 abaixo de zero.
+    """
+    desvio = desvio_mensal * np.sqrt(np.arange(1, meses + 1))
+    superior = HISTOGRAMA_DESVIOS * desvio + HISTOGRAMA_MARGEM
+    return -superior - desvio ** 2 / 2, superior
+
+class AcumuladorMonteCarlo:
+    """Estatísticas agregadas de um conjunto de caminhos, combináveis entre blocos"""
+
+    def __init__(self, meses: int, desvio_mensal: float):
+        self.meses = meses
+        self.inferior, superior = limites_histograma(meses, desvio_mensal)
+        self.largura = (superior - self.inferior) / HISTOGRAMA_CLASSES
+        self.contagens = np.zeros((meses, HISTOGRAMA_CLASSES), dtype=np.int64)
+        self.caminhos = 0
+        self.sucessos = 0
+        # Uma soma por bloco, totalizada com fsum para não depender da ordem de combinação
+        self.somas_finais = []
+
+    def adicionar(self, saldos, deterministico, meta: float):
+        """Reduz um bloco de caminhos (caminhos x meses) ao histograma"""
+        razao_log = np.log(saldos / deterministico)
+        classes = np.clip((razao_log - self.inferior) / self.largura, 0, HISTOGRAMA_CLASSES - 1).astype(np.int64)
+        classes += np.arange(self.meses, dtype=np.int64) * HISTOGRAMA_CLASSES
+        self.contagens += np.bincount(classes.ravel(), minlength=self.contagens.size).reshape(self.contagens.shape)
+
+        finais = saldos[:, -1]
+        self.caminhos += len(finais)
+        self.sucessos += int(np.count_nonzero(finais >= meta))
+        self.somas_finais.append(float(finais.sum()))
+
+    def combinar(self, outro: "AcumuladorMonteCarlo"):
+        """Soma as estatísticas de outro acumulador a este"""
+        self.contagens += outro.contagens
+        self.caminhos += outro.caminhos
+        self.sucessos += outro.sucessos
+        self.somas_finais.extend(outro.somas_finais)
+        return self
+
+    @property
+    def soma_final(self) -> float:
+        return math.fsum(self.somas_finais)
+
+    def percentis(self, deterministico, percentis=PERCENTIS):
+        """Percentis mês a mês, interpolados linearmente dentro de cada classe"""
+        acumuladas = np.cumsum(self.contagens, axis=1)
+        faixas = {}
+        for percentil in percentis:
+            alvo = percentil / 100 * self.caminhos
+            classe = np.minimum((acumuladas < alvo).sum(axis=1), HISTOGRAMA_CLASSES - 1)
+            linhas = np.arange(self.meses)
+            anteriores = np.where(classe > 0, acumuladas[linhas, np.maximum(classe - 1, 0)], 0)
+            na_classe = np.maximum(self.contagens[linhas, classe], 1)
+            fracao = np.clip((alvo - anteriores) / na_classe, 0.0, 1.0)
+            razao_log = self.inferior + (classe + fracao) * self.largura
+            faixas[f"p{percentil}"] = deterministico * np.exp(razao_log)
+        return faixas
+
+def sementes_blocos(semente, caminhos: int, tamanho_bloco: int = TAMANHO_BLOCO):
+    """Divide os caminhos em blocos, cada um com um fluxo aleatório independente
+
+    Os fluxos derivam de uma única SeedSequence, então o resultado depende
+    apenas da semente e do tamanho do bloco.
+    """
+    blocos = -(-caminhos // tamanho_bloco)
+    filhas = np.random.SeedSequence(semente).spawn(blocos)
+    tamanhos = [tamanho_bloco] * (blocos - 1) + [caminhos - tamanho_bloco * (blocos - 1)]
+    return list(zip(filhas, tamanhos))
+
+def _reduzir_blocos(blocos, aporte_mensal, meses, media_mensal, desvio_mensal, deterministico, meta):
+    """Gera e reduz blocos de caminhos em sequência, num único acumulador"""
+    acumulador = AcumuladorMonteCarlo(meses, desvio_mensal)
+    for semente_bloco, tamanho in blocos:
+        rng = np.random.default_rng(semente_bloco)
+        log_retornos = rng.normal(media_mensal, desvio_mensal, size=(tamanho, meses))
+        acumulador.adicionar(saldos_caminhos(log_retornos, aporte_mensal), deterministico, meta)
+    return acumulador
+
+def simular_blocos(blocos, aporte_mensal: float, anos: int, taxa_retorno: float, volatilidade: float, meta: float,
+                   threads: int = 1):
+    """Gera e reduz uma sequência de blocos de caminhos
+
+    Com threads > 1, os blocos são repartidos entre threads do processo,
+    aproveitando os trechos do NumPy que liberam o GIL; cada thread mantém
+    apenas o bloco corrente em memória.
+    """
+    meses = anos * 12
+    media_mensal, desvio_mensal = parametros_lognormais(taxa_retorno, volatilidade)
+    deterministico, _ = motor.serie_acumulacao(aporte_mensal, anos, taxa_retorno)
+    argumentos = (aporte_mensal, meses, media_mensal, desvio_mensal, deterministico[1:], meta)
+
+    threads = min(threads, len(blocos))
+    if threads <= 1:
+        return _reduzir_blocos(blocos, *argumentos)
+
+    acumulador = AcumuladorMonteCarlo(meses, desvio_mensal)
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        parciais = [executor.submit(_reduzir_blocos, blocos[inicio::threads], *argumentos) for inicio in range(threads)]
+        for parcial in parciais:
+            acumulador.combinar(parcial.result())
+    return acumulador
+
+def resumir(acumulador: AcumuladorMonteCarlo, aporte_mensal: float, anos: int, taxa_retorno: float, meta: float):
+    """Monta o resultado final a partir das estatísticas agregadas"""
+    deterministico, _ = motor.serie_acumulacao(aporte_mensal, anos, taxa_retorno)
+    faixas = acumulador.percentis(deterministico[1:])
+    return {
+        "percentis": {nome: np.concatenate(([0.0], serie)) for nome, serie in faixas.items()},
+        "valor_final": {nome: float(serie[-1]) for nome, serie in faixas.items()},
+        "valor_final_medio": acumulador.soma_final / acumulador.caminhos,
+        "valor_final_deterministico": float(deterministico[-1]),
+        "meta": meta,
+        "probabilidade_sucesso": acumulador.sucessos / acumulador.caminhos,
+        "caminhos": acumulador.caminhos,
+    }
+
+def simular(aporte_mensal: float, anos: int, taxa_retorno: float, volatilidade: float,
+            caminhos: int, semente=None, meta=None, tamanho_bloco: int = TAMANHO_BLOCO):
+    """Simulação de Monte Carlo da fase de acumulação
+
+    Os retornos mensais são lognormais com média compatível com taxa_retorno.
+    Sucesso é terminar com saldo maior ou igual à meta (por padrão, a
+    projeção determinística).
+    """
+    if meta is None:
+        meta = motor.valor_final(aporte_mensal, anos, taxa_retorno)
+    if aporte_mensal == 0:
+        meses = anos * 12
+        zeros = np.zeros(meses + 1)
+        return {
+            "percentis": {f"p{percentil}": zeros for percentil in PERCENTIS},
+            "valor_final": {f"p{percentil}": 0.0 for percentil in PERCENTIS},
+            "valor_final_medio": 0.0,
+            "valor_final_deterministico": 0.0,
+            "meta": meta,
+            "probabilidade_sucesso": float(meta <= 0),
+            "caminhos": caminhos,
+        }
+
+    blocos = sementes_blocos(semente, caminhos, tamanho_bloco)
+    acumulador = simular_blocos(blocos, aporte_mensal, anos, taxa_retorno, volatilidade, meta)
+    return resumir(acumulador, aporte_mensal, anos, taxa_retorno, meta)
+
+# Pools de processos reaproveitados entre chamadas, por número de processos;
+# a trava evita dois pools iguais quando requisições chegam juntas no threadpool
+_executores = {}
+_trava_executores = threading.Lock()
+
+def _executor_processos(processos: int) -> ProcessPoolExecutor:
+    """Devolve um pool de processos persistente; usa spawn para não herdar threads do servidor"""
+    with _trava_executores:
+        if processos not in _executores:
+            _executores[processos] = ProcessPoolExecutor(
+                max_workers=processos,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _executores[processos]
+
+def simular_paralelo(aporte_mensal: float, anos: int, taxa_retorno: float, volatilidade: float,
+                     caminhos: int, semente=None, meta=None, processos=None, threads: int = 1,
+                     tamanho_bloco: int = TAMANHO_BLOCO):
+    """Versão de simular que distribui os blocos de caminhos entre processos
+
+    Cada bloco tem seu próprio fluxo derivado da mesma SeedSequence e os
+    processos devolvem apenas os acumuladores, nunca os caminhos. O
+    resultado é idêntico bit a bit ao de simular, qualquer que seja o
+    número de processos ou threads.
+    """
+    if aporte_mensal == 0 or caminhos <= tamanho_bloco:
+        return simular(aporte_mensal, anos, taxa_retorno, volatilidade, caminhos, semente, meta, tamanho_bloco)
+    if meta is None:
+        meta = motor.valor_final(aporte_mensal, anos, taxa_retorno)
+    if semente is None:
+        semente = np.random.SeedSequence().entropy
+
+    blocos = sementes_blocos(semente, caminhos, tamanho_bloco)
+    processos = min(processos or os.cpu_count() or 1, len(blocos))
+    # Blocos intercalados entre os processos para equilibrar a carga
+    fatias = [blocos[inicio::processos] for inicio in range(processos)]
+
+    executor = _executor_processos(processos)
+    parciais = [
+        executor.submit(simular_blocos, fatia, aporte_mensal, anos, taxa_retorno, volatilidade, meta, threads)
+        for fatia in fatias
+    ]
+    acumulador = AcumuladorMonteCarlo(anos * 12, parametros_lognormais(taxa_retorno, volatilidade)[1])
+    for parcial in parciais:
+        acumulador.combinar(parcial.result())
+    return resumir(acumulador, aporte_mensal, anos, taxa_retorno, meta)
@@ -0,0 +1,233 @@
+import math
+
+# O motor não importa nada pesado ao ser carregado: as funções escalares usam
+# só math, e as vetorizadas importam o NumPy na primeira chamada. Assim a API,
+# a interface e os scripts compartilham este módulo sem pagar o NumPy à toa.
+
+# Versão do motor de cálculo; mude sempre que os resultados mudarem, para invalidar caches
+VERSAO = "3"
+
+def taxa_mensal_equivalente(taxa_retorno: float) -> float:
+    """Converte a taxa anual na taxa mensal equivalente"""
+    return (1 + taxa_retorno) ** (1/12) - 1
+
+def fator_acumulacao(taxa_mensal: float, meses: int) -> float:
+    """Fator de valor futuro de uma série de aportes iguais: ((1 + i)^n - 1) / i"""
+    if taxa_mensal == 0:
+        return float(meses)
+    # expm1/log1p preservam a precisão quando a taxa mensal é pequena
+    return math.expm1(meses * math.log1p(taxa_mensal)) / taxa_mensal
+
+def valor_final(aporte_mensal: float, anos: int, taxa_retorno: float, crescimento_aporte: float = 0.0) -> float:
+    """Saldo ao fim da acumulação em O(1), sem gerar a série mensal"""
+    taxa_mensal = taxa_mensal_equivalente(taxa_retorno)
+    if crescimento_aporte == 0:
+        return aporte_mensal * fator_acumulacao(taxa_mensal, anos * 12)
+    return aporte_mensal * float(fatores_acumulacao_crescentes(taxa_mensal, crescimento_aporte, anos * 12))
+
+def validar_entrada(valor, min_valor, max_valor, nome_campo):
+    """Valida os valores de entrada"""
+    if not isinstance(valor, (int, float)):
+        raise ValueError(f"{nome_campo} deve ser um número")
+    if valor < min_valor or valor > max_valor:
+        raise ValueError(f"{nome_campo} deve estar entre {min_valor} e {max_valor}")
+    return valor
+
+def fatores_acumulacao(taxa_mensal, meses):
+    """Versão vetorizada de fator_acumulacao, com broadcast entre taxas e meses"""
+    import numpy as np
+
+    taxa_mensal = np.asarray(taxa_mensal, dtype=np.float64)
+    meses = np.asarray(meses, dtype=np.float64)
+    taxa_nula = taxa_mensal == 0
+    divisor = np.where(taxa_nula, 1.0, taxa_mensal)
+    return np.where(taxa_nula, meses, np.expm1(meses * np.log1p(taxa_mensal)) / divisor)
+
+def fatores_acumulacao_crescentes(taxa_mensal, crescimento_aporte, meses):
+    """Saldo por unidade de aporte inicial quando o aporte é reajustado a cada 12 meses
+
+    Com R = (1 + i)^12, C = 1 + c e meses = 12 y + k, o saldo ao fim de y
+    anos completos é F(i, 12) (R^y - C^y) / (R - C) (anuidade crescente), que
+    então rende por k meses enquanto entram k aportes de C^y. A razão é
+    calculada como C^(y-1) expm1(y d) / expm1(d), com d = log(R / C), para
+    não perder precisão quando R e C são próximos; com d = 0 ela vale
+    y C^(y-1). Aceita broadcast em todos os argumentos.
+    """
+    import numpy as np
+
+    taxa_mensal = np.asarray(taxa_mensal, dtype=np.float64)
+    crescimento_aporte = np.asarray(crescimento_aporte, dtype=np.float64)
+    crescimento = 1 + crescimento_aporte
+    meses = np.asarray(meses, dtype=np.float64)
+
+    anos = np.floor(meses / 12)
+    resto = meses - 12 * anos
+    diferenca_log = 12 * np.log1p(taxa_mensal) - np.log1p(crescimento_aporte)
+    iguais = diferenca_log == 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        razao = np.where(iguais, anos, np.expm1(anos * diferenca_log) / np.where(iguais, 1.0, np.expm1(diferenca_log)))
+    soma_anual = crescimento ** (anos - 1) * razao
+    saldo_anos_completos = fatores_acumulacao(taxa_mensal, 12) * soma_anual
+    return (
+        saldo_anos_completos * np.exp(resto * np.log1p(taxa_mensal))
+        + crescimento ** anos * fatores_acumulacao(taxa_mensal, resto)
+    )
+
+def aportes_acumulados_crescentes(crescimento_aporte, meses):
+    """Total aportado por unidade de aporte inicial, com reajuste a cada 12 meses"""
+    import numpy as np
+
+    crescimento_aporte = np.asarray(crescimento_aporte, dtype=np.float64)
+    meses = np.asarray(meses, dtype=np.float64)
+    anos = np.floor(meses / 12)
+    resto = meses - 12 * anos
+    crescimento = (1 + crescimento_aporte) ** anos
+    sem_crescimento = crescimento_aporte == 0
+    anos_completos = np.where(
+        sem_crescimento,
+        12 * anos,
+        12 * (crescimento - 1) / np.where(sem_crescimento, 1.0, crescimento_aporte)
+    )
+    return anos_completos + resto * crescimento
+
+def deflacionar(valores, inflacao, meses):
+    """Traz valores nominais do mês informado para reais de hoje"""
+    import numpy as np
+
+    return valores / np.exp(np.asarray(meses, dtype=np.float64) / 12 * np.log1p(inflacao))
+
+def serie_acumulacao(aporte_mensal: float, anos: int, taxa_retorno: float, crescimento_aporte: float = 0.0):
+    """Gera as séries mensais de saldo e aportes como arrays NumPy
+
+    O aporte entra no fim de cada mês, como no laço original:
+    saldo[m] = saldo[m-1] * (1 + i) + aporte, com saldo[0] = 0. Com
+    crescimento_aporte, o aporte é reajustado a cada 12 meses.
+    """
+    import numpy as np
+
+    meses = np.arange(anos * 12 + 1, dtype=np.float64)
+    taxa_mensal = taxa_mensal_equivalente(taxa_retorno)
+
+    if crescimento_aporte == 0:
+        saldo_acumulado = aporte_mensal * fatores_acumulacao(taxa_mensal, meses)
+        aportes_totais = aporte_mensal * meses
+    else:
+        saldo_acumulado = aporte_mensal * fatores_acumulacao_crescentes(taxa_mensal, crescimento_aporte, meses)
+        aportes_totais = aporte_mensal * aportes_acumulados_crescentes(crescimento_aporte, meses)
+
+    return saldo_acumulado, aportes_totais
+
+def calcular_aposentadoria(aporte_mensal: float, anos: int, taxa_retorno: float, taxa_retirada: float,
+                           crescimento_aporte: float = 0.0, inflacao: float = 0.0):
+    """Calcula os valores da aposentadoria, com as séries como arrays NumPy
+
+    Usado pela API e pela interface. Com crescimento_aporte o aporte é
+    reajustado uma vez por ano; com inflacao, os resultados também são
+    devolvidos em valores de hoje.
+    """
+    saldo_acumulado, aportes_totais = serie_acumulacao(aporte_mensal, anos, taxa_retorno, crescimento_aporte)
+
+    valor = valor_final(aporte_mensal, anos, taxa_retorno, crescimento_aporte)
+    total_investido = float(aportes_totais[-1])
+
+    resultados = {
+        "valor_final": valor,
+        "total_investido": total_investido,
+        "rendimentos": valor - total_investido,
+        "saque_mensal": (valor * taxa_retirada) / 12,
+        "saldo_acumulado": saldo_acumulado,
+        "aportes_totais": aportes_totais
+    }
+
+    if inflacao > 0:
+        valor_final_real = float(deflacionar(valor, inflacao, anos * 12))
+        resultados["valor_final_real"] = valor_final_real
+        resultados["saque_mensal_real"] = (valor_final_real * taxa_retirada) / 12
+        resultados["saldo_acumulado_real"] = deflacionar(saldo_acumulado, inflacao, range(len(saldo_acumulado)))
+
+    return resultados
+
+def calcular_lote(aporte_mensal, anos, taxa_retorno, taxa_retirada, crescimento_aporte=0.0, inflacao=0.0,
+                  incluir_series: bool = False):
+    """Calcula vários cenários de uma vez, em um único broadcast NumPy
+
+    Os vetores de entrada devem ter o mesmo tamanho (ou tamanho 1). Com
+    incluir_series, as séries são devolvidas numa matriz cenários x meses
+    preenchida com NaN após o horizonte de cada cenário. Os valores reais
+    descontam a inflação acumulada até o fim do horizonte.
+    """
+    import numpy as np
+
+    aporte_mensal, anos, taxa_retorno, taxa_retirada, crescimento_aporte, inflacao = np.broadcast_arrays(
+        np.atleast_1d(np.asarray(aporte_mensal, dtype=np.float64)),
+        np.atleast_1d(np.asarray(anos, dtype=np.int64)),
+        np.atleast_1d(np.asarray(taxa_retorno, dtype=np.float64)),
+        np.atleast_1d(np.asarray(taxa_retirada, dtype=np.float64)),
+        np.atleast_1d(np.asarray(crescimento_aporte, dtype=np.float64)),
+        np.atleast_1d(np.asarray(inflacao, dtype=np.float64)),
+    )
+    meses = anos * 12
+    taxa_mensal = (1 + taxa_retorno) ** (1/12) - 1
+    com_crescimento = bool(np.any(crescimento_aporte != 0))
+
+    if com_crescimento:
+        valor_final = aporte_mensal * fatores_acumulacao_crescentes(taxa_mensal, crescimento_aporte, meses)
+        total_investido = aporte_mensal * aportes_acumulados_crescentes(crescimento_aporte, meses)
+    else:
+        valor_final = aporte_mensal * fatores_acumulacao(taxa_mensal, meses)
+        total_investido = aporte_mensal * meses
+    valor_final_real = deflacionar(valor_final, inflacao, meses)
+    resultados = {
+        "valor_final": valor_final,
+        "total_investido": total_investido,
+        "rendimentos": valor_final - total_investido,
+        "saque_mensal": valor_final * taxa_retirada / 12,
+        "valor_final_real": valor_final_real,
+        "saque_mensal_real": valor_final_real * taxa_retirada / 12,
+        "meses": meses,
+    }
+
+    if incluir_series:
+        coluna = np.arange(int(meses.max(initial=0)) + 1, dtype=np.float64)
+        fora_do_horizonte = coluna[None, :] > meses[:, None]
+        if com_crescimento:
+            saldo_acumulado = aporte_mensal[:, None] * fatores_acumulacao_crescentes(
+                taxa_mensal[:, None], crescimento_aporte[:, None], coluna[None, :]
+            )
+            aportes_totais = aporte_mensal[:, None] * aportes_acumulados_crescentes(crescimento_aporte[:, None], coluna[None, :])
+        else:
+            saldo_acumulado = aporte_mensal[:, None] * fatores_acumulacao(taxa_mensal[:, None], coluna[None, :])
+            aportes_totais = aporte_mensal[:, None] * coluna[None, :]
+        saldo_acumulado[fora_do_horizonte] = np.nan
+        aportes_totais[fora_do_horizonte] = np.nan
+        resultados["saldo_acumulado"] = saldo_acumulado
+        resultados["aportes_totais"] = aportes_totais
+
+    return resultados
+
+# Parâmetros que podem variar numa grade de sensibilidade
+PARAMETROS_GRADE = ("aporte_mensal", "anos", "taxa_retorno", "taxa_retirada")
+
+def grade_sensibilidade(base: dict, parametro_x: str, valores_x, parametro_y: str, valores_y):
+    """Avalia valor_final e saque_mensal para todas as combinações de dois parâmetros
+
+    base traz os valores fixos dos quatro parâmetros; as linhas do resultado
+    seguem valores_y e as colunas valores_x, numa única avaliação vetorizada.
+    """
+    import numpy as np
+
+    if parametro_x == parametro_y:
+        raise ValueError("Os eixos da grade devem usar parâmetros diferentes")
+    for parametro in (parametro_x, parametro_y):
+        if parametro not in PARAMETROS_GRADE:
+            raise ValueError(f"Parâmetro desconhecido: {parametro}")
+
+    entradas = {parametro: np.asarray(base[parametro]) for parametro in PARAMETROS_GRADE}
+    entradas[parametro_x] = np.asarray(valores_x)[None, :]
+    entradas[parametro_y] = np.asarray(valores_y)[:, None]
+
+    resultados = calcular_lote(**entradas)
+    return {
+        "valor_final": resultados["valor_final"],
+        "saque_mensal": resultados["saque_mensal"],
+    }
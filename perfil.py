@@ -0,0 +1,117 @@
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import tempfile
+import threading
+import time
+import uuid
+
+# O modo de perfil só existe com PERFIL_ATIVO=1 e um PERFIL_TOKEN definido; sem
+# isso o middleware nem é instalado e as requisições não pagam nada
+ATIVO = os.environ.get("PERFIL_ATIVO") == "1" and bool(os.environ.get("PERFIL_TOKEN"))
+TOKEN = os.environ.get("PERFIL_TOKEN", "")
+PASTA = os.environ.get("PERFIL_PASTA", os.path.join(tempfile.gettempdir(), "calculadora_perfis"))
+
+# Cabeçalho que pede o perfil de uma requisição (com o token como valor)
+CABECALHO = b"x-perfil-token"
+
+# Rotas que podem ser perfiladas e prefixo da rota que devolve um perfil gravado
+ROTAS = ("/calcular", "/calcular/lote")
+ROTA_LEITURA = "/perfil/"
+
+# Funções listadas no resumo em texto
+LINHAS_RESUMO = 40
+
+# Só um perfil por vez: dois cProfile ligados na mesma thread não convivem
+_ocupado = threading.Lock()
+
+def token_valido(scope) -> bool:
+    for nome, valor in scope["headers"]:
+        if nome == CABECALHO:
+            return hmac.compare_digest(valor, TOKEN.encode())
+    return False
+
+def gravar(perfil: cProfile.Profile, nome: str, rota: str, duracao: float) -> str:
+    """Grava o .prof (pstats, para snakeviz e afins) e um resumo .txt ordenado por tempo acumulado"""
+    os.makedirs(PASTA, exist_ok=True)
+    caminho = os.path.join(PASTA, nome)
+    perfil.dump_stats(caminho + ".prof")
+
+    resumo = io.StringIO()
+    resumo.write(f"{rota} em {duracao * 1e3:.2f} ms\n\n")
+    pstats.Stats(perfil, stream=resumo).sort_stats("cumulative").print_stats(LINHAS_RESUMO)
+    with open(caminho + ".txt", "w") as arquivo:
+        arquivo.write(resumo.getvalue())
+    return caminho
+
+async def _responder(send, status: int, corpo: bytes, tipo: bytes = b"text/plain; charset=utf-8"):
+    await send({"type": "http.response.start", "status": status, "headers": [(b"content-type", tipo)]})
+    await send({"type": "http.response.body", "body": corpo})
+
+class MiddlewarePerfil:
+    """Middleware ASGI que roda uma requisição sob o cProfile quando o admin pede
+
+    Uma requisição a /calcular ou /calcular/lote com o cabeçalho
+    X-Perfil-Token igual a PERFIL_TOKEN é executada com o cProfile ligado;
+    o perfil é gravado em PERFIL_PASTA e o nome volta no cabeçalho
+    X-Perfil da resposta, que segue normal. GET /perfil/<nome>, com o
+    mesmo cabeçalho, devolve o resumo em texto (ou o .prof, com
+    /perfil/<nome>.prof). O cProfile mede a thread inteira, então
+    requisições concorrentes no mesmo event loop também aparecem no perfil;
+    enquanto um perfil está em andamento, outros pedidos seguem sem perfil.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not token_valido(scope):
+            await self.app(scope, receive, send)
+            return
+
+        caminho = scope["path"]
+        if caminho.startswith(ROTA_LEITURA):
+            await self._ler(caminho[len(ROTA_LEITURA):], send)
+            return
+        if caminho not in ROTAS:
+            await self.app(scope, receive, send)
+            return
+
+        if not _ocupado.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        nome = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+        async def enviar(mensagem):
+            if mensagem["type"] == "http.response.start":
+                mensagem = {**mensagem, "headers": [*mensagem.get("headers", []), (b"x-perfil", nome.encode())]}
+            await send(mensagem)
+
+        perfil = cProfile.Profile()
+        inicio = time.perf_counter()
+        perfil.enable()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            perfil.disable()
+            try:
+                gravar(perfil, nome, caminho, time.perf_counter() - inicio)
+            finally:
+                _ocupado.release()
+
+    async def _ler(self, nome: str, send):
+        base, extensao = os.path.splitext(nome)
+        # O nome vem da URL: só aceita o formato gerado acima, sem caminhos
+        if extensao not in ("", ".prof") or not base.replace("-", "").isalnum():
+            await _responder(send, 404, b"Perfil desconhecido")
+            return
+        arquivo = os.path.join(PASTA, base + (extensao or ".txt"))
+        if not os.path.exists(arquivo):
+            await _responder(send, 404, b"Perfil desconhecido")
+            return
+        with open(arquivo, "rb") as entrada:
+            corpo = entrada.read()
+        await _responder(send, 200, corpo, b"application/octet-stream" if extensao else b"text/plain; charset=utf-8")
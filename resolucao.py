@@ -0,0 +1,75 @@
+import numpy as np
+
+# Resoluções aceitas para as séries de /calcular
+RESOLUCOES = ("mensal", "anual", "pontos")
+
+def indices_anuais(tamanho: int):
+    """Índices do fim de cada bloco de 12 meses (mês 0, 12, 24, ...)
+
+    A série tem meses + 1 pontos; os meses 1..n são agrupados numa matriz
+    anos x 12 e cada ano é representado pelo seu último mês.
+    """
+    meses = np.arange(1, tamanho)
+    anos = len(meses) // 12
+    return np.concatenate(([0], meses[:anos * 12].reshape(anos, 12)[:, -1]))
+
+def indices_lttb(y, pontos: int):
+    """Índices escolhidos pelo Largest-Triangle-Three-Buckets
+
+    Mantém o primeiro e o último ponto e, em cada balde intermediário,
+    escolhe o ponto que forma o maior triângulo com o ponto escolhido no
+    balde anterior e a média do balde seguinte. O eixo x é o próprio índice.
+    As médias dos baldes saem de uma soma acumulada; o laço, que depende
+    do ponto escolhido no balde anterior, usa floats do Python, mais
+    rápidos que fatias NumPy de poucos elementos.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    tamanho = len(y)
+    if pontos >= tamanho:
+        return np.arange(tamanho)
+    if pontos <= 2:
+        return np.array([0, tamanho - 1])
+
+    # Limites dos baldes intermediários sobre os pontos 1..tamanho-2
+    limites = np.floor(np.linspace(1, tamanho - 1, pontos - 1)).astype(np.int64).tolist()
+    acumulada = np.concatenate(([0.0], np.cumsum(y))).tolist()
+    valores = y.tolist()
+    escolhidos = [0] * pontos
+    escolhidos[-1] = tamanho - 1
+
+    anterior = 0
+    for balde in range(pontos - 2):
+        inicio, fim = limites[balde], limites[balde + 1]
+        if balde + 2 < len(limites):
+            proximo_inicio, proximo_fim = fim, limites[balde + 2]
+            media_x = (proximo_inicio + proximo_fim - 1) / 2
+            media_y = (acumulada[proximo_fim] - acumulada[proximo_inicio]) / (proximo_fim - proximo_inicio)
+        else:
+            media_x, media_y = float(tamanho - 1), valores[-1]
+
+        # O dobro da área do triângulo; o primeiro máximo vence, como no argmax
+        x_anterior, y_anterior = float(anterior), valores[anterior]
+        dx, dy = x_anterior - media_x, media_y - y_anterior
+        maior, escolhido = -1.0, inicio
+        for candidato in range(inicio, fim):
+            area = abs(dx * (valores[candidato] - y_anterior) - (x_anterior - candidato) * dy)
+            if area > maior:
+                maior, escolhido = area, candidato
+        anterior = escolhido
+        escolhidos[balde + 1] = escolhido
+
+    return np.array(escolhidos, dtype=np.int64)
+
+def indices_resolucao(tamanho: int, resolucao: str, pontos: int = 100, referencia=None):
+    """Índices da série a manter para a resolução pedida
+
+    Para "pontos", referencia é a série usada pelo LTTB; as demais séries
+    devem ser recortadas com os mesmos índices para continuar alinhadas.
+    """
+    if resolucao == "mensal":
+        return np.arange(tamanho)
+    if resolucao == "anual":
+        return indices_anuais(tamanho)
+    if resolucao == "pontos":
+        return indices_lttb(referencia, pontos)
+    raise ValueError(f"Resolução desconhecida: {resolucao}")
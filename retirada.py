@@ -0,0 +1,119 @@
+import numpy as np
+
+def _taxa_mensal(taxa_anual):
+    return (1 + np.asarray(taxa_anual, dtype=np.float64)) ** (1/12) - 1
+
+def saldo_retirada(saldo_inicial, saque_inicial, taxa_mensal, inflacao_mensal, meses):
+    """Saldo após `meses` de saques corrigidos mês a mês, em forma fechada
+
+    Com o saque no fim de cada mês e corrigido pela inflação mensal g:
+    B_t = B_0 (1 + i)^t - W ((1 + i)^t - (1 + g)^t) / (i - g),
+    que vira W t (1 + i)^(t - 1) quando i = g. A diferença de potências é
+    calculada como (1 + g)^t expm1(t d), com d = log1p((i - g) / (1 + g)),
+    para não perder precisão quando i e g são próximos. Aceita broadcast
+    em todos os argumentos e não trunca o saldo em zero.
+    """
+    taxa_mensal = np.asarray(taxa_mensal, dtype=np.float64)
+    inflacao_mensal = np.asarray(inflacao_mensal, dtype=np.float64)
+    meses = np.asarray(meses, dtype=np.float64)
+
+    crescimento = np.exp(meses * np.log1p(taxa_mensal))
+    correcao = np.exp(meses * np.log1p(inflacao_mensal))
+    diferenca = taxa_mensal - inflacao_mensal
+    taxas_iguais = diferenca == 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        soma_saques = np.where(
+            taxas_iguais,
+            meses * crescimento / (1 + taxa_mensal),
+            correcao * np.expm1(meses * np.log1p(diferenca / (1 + inflacao_mensal)))
+            / np.where(taxas_iguais, 1.0, diferenca)
+        )
+    return saldo_inicial * crescimento - saque_inicial * soma_saques
+
+def mes_esgotamento(saldo_inicial, saque_inicial, taxa_mensal, inflacao_mensal):
+    """Primeiro mês em que o saldo zera, em forma fechada; inf se os saques forem perpétuos
+
+    Igualando B_t a zero com q = (1 + g) / (1 + i) e x = B_0 (i - g) / W,
+    t = log(1 - x) / log(q). Se o retorno supera a inflação e x >= 1, o
+    rendimento cobre os saques para sempre.
+    """
+    saldo_inicial, saque_inicial, taxa_mensal, inflacao_mensal = np.broadcast_arrays(
+        np.asarray(saldo_inicial, dtype=np.float64),
+        np.asarray(saque_inicial, dtype=np.float64),
+        np.asarray(taxa_mensal, dtype=np.float64),
+        np.asarray(inflacao_mensal, dtype=np.float64),
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x = saldo_inicial * (taxa_mensal - inflacao_mensal) / saque_inicial
+        # log(q) sem subtrair dois logaritmos próximos quando i e g quase coincidem
+        log_q = -np.log1p((taxa_mensal - inflacao_mensal) / (1 + inflacao_mensal))
+        meses = np.where(
+            log_q == 0,
+            saldo_inicial * (1 + taxa_mensal) / saque_inicial,
+            np.where(x < 1, np.log1p(-x) / np.where(log_q == 0, 1.0, log_q), np.inf)
+        )
+    meses = np.where(saque_inicial > 0, meses, np.inf)
+    # Tolerância para que um saldo que zera exatamente no mês t não passe para t + 1
+    return np.where(np.isfinite(meses), np.maximum(np.ceil(meses - 1e-9), 1), np.inf)
+
+def fatores_correcao(meses: int, inflacao, reajuste: str = "mensal"):
+    """Fator de correção do saque em cada mês 1..meses, mensal ou uma vez por ano"""
+    mes = np.arange(meses, dtype=np.float64)
+    if reajuste == "anual":
+        return (1 + np.asarray(inflacao, dtype=np.float64)) ** np.floor(mes / 12)
+    if reajuste == "mensal":
+        return np.exp(mes * np.log1p(_taxa_mensal(inflacao)))
+    raise ValueError(f"Reajuste desconhecido: {reajuste}")
+
+def serie_retirada(saldo_inicial: float, saque_inicial: float, taxa_retorno: float, inflacao: float, anos: int):
+    """Séries mensais de saldo e saques da retirada com reajuste mensal, em forma fechada
+
+    Depois do esgotamento o saldo fica em zero e os saques param.
+    """
+    meses = np.arange(anos * 12 + 1, dtype=np.float64)
+    taxa_mensal = _taxa_mensal(taxa_retorno)
+    inflacao_mensal = _taxa_mensal(inflacao)
+
+    saldos = saldo_retirada(saldo_inicial, saque_inicial, taxa_mensal, inflacao_mensal, meses)
+    esgotamento = mes_esgotamento(saldo_inicial, saque_inicial, taxa_mensal, inflacao_mensal)
+    saques = np.concatenate(([0.0], saque_inicial * fatores_correcao(anos * 12, inflacao)))
+
+    # No mês do esgotamento só se saca o que resta
+    if np.isfinite(esgotamento) and esgotamento <= anos * 12:
+        ultimo = int(esgotamento)
+        saques[ultimo] += saldos[ultimo]
+        saques[ultimo + 1:] = 0.0
+        saldos[ultimo:] = 0.0
+
+    return saldos, saques, float(esgotamento)
+
+def simular_retirada_passos(saldo_inicial, saque_inicial, taxas_mensais, inflacao, reajuste: str = "mensal"):
+    """Retirada mês a mês para muitos cenários de uma vez, quando não há forma fechada
+
+    taxas_mensais tem forma (cenários, meses), o que cobre retornos que
+    variam no tempo (Monte Carlo, séries históricas) e o reajuste anual
+    dos saques. O laço é sobre os meses; cada passo é vetorizado entre os
+    cenários. Retorna a matriz de saldos, a de saques efetivos e o mês de
+    esgotamento de cada cenário (inf se não esgota no horizonte).
+    """
+    taxas_mensais = np.atleast_2d(np.asarray(taxas_mensais, dtype=np.float64))
+    cenarios, meses = taxas_mensais.shape
+    saldo = np.broadcast_to(np.asarray(saldo_inicial, dtype=np.float64), (cenarios,)).copy()
+    saque_base = np.broadcast_to(np.asarray(saque_inicial, dtype=np.float64), (cenarios,))
+    correcao = fatores_correcao(meses, inflacao, reajuste)
+
+    saldos = np.empty((cenarios, meses + 1))
+    saques = np.zeros((cenarios, meses + 1))
+    saldos[:, 0] = saldo
+    esgotamento = np.full(cenarios, np.inf)
+
+    for mes in range(meses):
+        saldo = saldo * (1 + taxas_mensais[:, mes])
+        saque = np.minimum(saque_base * correcao[mes], saldo)
+        saldo = saldo - saque
+        esgotou = (saldo <= 0) & np.isinf(esgotamento) & (saque_base > 0)
+        esgotamento[esgotou] = mes + 1
+        saques[:, mes + 1] = saque
+        saldos[:, mes + 1] = saldo
+
+    return saldos, saques, esgotamento
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Adiciona o diretório raiz ao PATH do Python
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
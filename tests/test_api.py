@@ -0,0 +1,81 @@
+import os
+import subprocess
+import sys
+
+from fastapi.testclient import TestClient
+
+import formatos
+import index
+
+cliente = TestClient(index.app)
+
+def lote(cenarios: int, **extras):
+    return {
+        "aporte_mensal": [2000.0] * cenarios,
+        "anos": [25],
+        "taxa_retorno": [0.10],
+        "taxa_retirada": [0.04],
+        **extras,
+    }
+
+def test_lote_com_series_limitado_em_json():
+    resposta = cliente.post("/calcular/lote", json=lote(index.LOTE_MAX_CENARIOS_SERIES + 1, incluir_series=True))
+    assert resposta.status_code == 400
+    assert "incluir_series" in resposta.json()["detail"]
+
+    resposta = cliente.post("/calcular/lote", json=lote(3, incluir_series=True))
+    assert resposta.status_code == 200
+    assert len(resposta.json()["saldo_acumulado"]) == 3
+
+def test_lote_com_series_em_ndjson_sem_limite_de_series():
+    resposta = cliente.post(
+        "/calcular/lote", json=lote(index.LOTE_MAX_CENARIOS_SERIES + 1, incluir_series=True),
+        headers={"Accept": "application/x-ndjson"}
+    )
+    assert resposta.status_code == 200
+    assert len(resposta.text.splitlines()) == index.LOTE_MAX_CENARIOS_SERIES + 1
+
+def test_formatos_binarios_importados_sob_demanda():
+    # Importar a API não carrega o pyarrow nem o msgpack
+    processo = subprocess.run(
+        [sys.executable, "-c", "import sys, index; print('pyarrow' in sys.modules, 'msgpack' in sys.modules)"],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(index.__file__)), check=True
+    )
+    assert processo.stdout.split() == ["False", "False"]
+
+def test_resposta_msgpack_e_arrow():
+    corpo = {"aporte_mensal": 2000.0, "anos": 25, "taxa_retorno": 0.10, "taxa_retirada": 0.04}
+    for tipo in (formatos.TIPO_MSGPACK, formatos.TIPO_ARROW):
+        if tipo not in formatos.tipos_disponiveis():
+            continue
+        resposta = cliente.post("/calcular", json=corpo, headers={"Accept": tipo})
+        assert resposta.status_code == 200
+        assert resposta.headers["content-type"].startswith(tipo)
+
+def test_metrics_histograma_em_ordem():
+    for _ in range(3):
+        cliente.post("/calcular", json={"aporte_mensal": 1000.0, "anos": 20})
+    texto = cliente.get("/metrics").text
+
+    # Linhas de cada conjunto de rótulos do histograma de latência, na ordem exportada
+    grupos = {}
+    for linha in texto.splitlines():
+        if not linha.startswith("calculadora_latencia_segundos"):
+            continue
+        serie, valor = linha.rsplit(" ", 1)
+        nome, _, rotulos = serie.partition("{")
+        rotulos = [tuple(par.split("=", 1)) for par in rotulos.rstrip("}").split(",")]
+        le = dict(rotulos).pop("le", None)
+        chave = tuple(par for par in rotulos if par[0] != "le")
+        grupos.setdefault(chave, []).append((nome.rsplit("_", 1)[-1], le, float(valor)))
+
+    assert grupos
+    for linhas in grupos.values():
+        assert [sufixo for sufixo, _, _ in linhas[-2:]] == ["sum", "count"]
+        baldes = linhas[:-2]
+        assert all(sufixo == "bucket" for sufixo, _, _ in baldes)
+        limites = [float(le.strip('"')) for _, le, _ in baldes]
+        assert limites == sorted(limites) and limites[-1] == float("inf")
+        contagens = [valor for _, _, valor in baldes]
+        assert contagens == sorted(contagens)
+        assert linhas[-1][2] == contagens[-1]
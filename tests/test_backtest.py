@@ -0,0 +1,67 @@
+import os
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import backtest
+import index
+
+# 180 meses de inflação a ~20% ao mês seguidos de 240 meses de juros e inflação baixos
+CAMINHO_FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dados", "retornos_mensais.csv")
+
+@pytest.fixture
+def serie():
+    return backtest.carregar_serie(CAMINHO_FIXTURE)
+
+def laco(retornos, aporte_mensal, meses):
+    """Saldo no fim de cada janela, mês a mês e janela a janela"""
+    saldos = []
+    for inicio in range(len(retornos) - meses + 1):
+        saldo = 0.0
+        for retorno in retornos[inicio:inicio + meses]:
+            saldo = saldo * (1 + retorno) + aporte_mensal
+        saldos.append(saldo)
+    return np.array(saldos)
+
+def test_carrega_csv(serie):
+    assert serie.datas[0] == "1980-01"
+    assert len(serie.datas) == 420
+    assert serie.ativos == ["ibovespa", "cdi"]
+
+@pytest.mark.parametrize("carteira, real", [
+    ({"cdi": 1.0}, False),
+    ({"ibovespa": 0.6, "cdi": 0.4}, False),
+    ({"cdi": 1.0}, True),
+])
+@pytest.mark.parametrize("anos", [1, 10, 30])
+def test_backtest_igual_ao_laco(serie, carteira, real, anos):
+    retornos = np.expm1(serie.log_retornos(carteira, real))
+    esperado = laco(retornos, 1000.0, anos * 12)
+
+    resultados = backtest.backtest(serie, 1000.0, anos, 0.04, carteira, real)
+    np.testing.assert_allclose(resultados["valor_final"], esperado, rtol=1e-9)
+    np.testing.assert_allclose(
+        resultados["fator_crescimento"],
+        [np.prod(1 + retornos[inicio:inicio + anos * 12]) for inicio in range(len(esperado))],
+        rtol=1e-9
+    )
+
+def test_somas_prefixadas_quando_a_amplitude_e_pequena(serie):
+    # Só o trecho de inflação baixa: o caminho O(1) é usado e bate com o laço
+    log_retornos = serie.log_retornos({"cdi": 1.0})[180:]
+    prefixo, _ = backtest.indices_prefixados(log_retornos)
+    assert np.ptp(prefixo) <= backtest.AMPLITUDE_MAXIMA_PREFIXOS
+    np.testing.assert_allclose(
+        backtest.saldos_janelas(log_retornos, 1000.0, 120), laco(np.expm1(log_retornos), 1000.0, 120), rtol=1e-9
+    )
+
+def test_endpoint_historico(serie, monkeypatch):
+    monkeypatch.setattr(backtest, "carregar_serie", lambda: serie)
+    resposta = TestClient(index.app).post("/calcular/historico", json={
+        "aporte_mensal": 1000.0, "anos": 10, "taxa_retirada": 0.04, "carteira": {"cdi": 1.0},
+    })
+    assert resposta.status_code == 200
+    dados = resposta.json()
+    assert len(dados["valor_final"]) == 420 - 120 + 1
+    assert dados["resumo"]["minimo"] <= dados["resumo"]["mediana"] <= dados["resumo"]["maximo"]
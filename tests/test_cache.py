@@ -0,0 +1,172 @@
+import sqlite3
+import time
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import cache
+import index
+
+PARAMETROS = {
+    "aporte_mensal": 2000.0, "anos": 25, "taxa_retorno": 0.10, "taxa_retirada": 0.04,
+    "crescimento_aporte": 0.0, "inflacao": 0.04, "resolucao_series": "pontos", "pontos": 100,
+}
+
+def consulta_get() -> dict:
+    consulta = {campo: valor for campo, valor in PARAMETROS.items() if campo != "resolucao_series"}
+    consulta["resolucao"] = "pontos"
+    return consulta
+
+def test_cache_em_disco_devolve_o_mesmo_resultado(tmp_path):
+    disco = cache.CacheSQLite(str(tmp_path / "cache.sqlite"))
+    calculado = index.calcular_aposentadoria_arrays(**PARAMETROS)
+    chave = cache.chave("calcular", PARAMETROS)
+    disco.guardar(chave, calculado)
+
+    lido = disco.obter(chave)
+    assert lido.keys() == calculado.keys()
+    for campo, valor in calculado.items():
+        if isinstance(valor, np.ndarray):
+            assert lido[campo].dtype == valor.dtype
+            assert np.array_equal(lido[campo], valor)
+            assert not lido[campo].flags.writeable
+        else:
+            assert lido[campo] == valor
+
+def test_resposta_igual_com_e_sem_cache_em_disco(tmp_path, monkeypatch):
+    cliente = TestClient(index.app)
+    consulta = consulta_get()
+
+    monkeypatch.setattr(cache, "disco", None)
+    cache.calculos.limpar()
+    sem_disco = cliente.get("/calcular", params=consulta)
+
+    monkeypatch.setattr(cache, "disco", cache.CacheSQLite(str(tmp_path / "cache.sqlite")))
+    cache.calculos.limpar()
+    cliente.get("/calcular", params=consulta)
+    # Segunda consulta sem o cache do processo: o resultado vem do disco
+    cache.calculos.limpar()
+    do_disco = cliente.get("/calcular", params=consulta)
+
+    assert cache.disco.acertos == 1
+    assert do_disco.content == sem_disco.content
+    assert do_disco.headers["etag"] == sem_disco.headers["etag"]
+
+def test_if_none_match_devolve_304_sem_calcular(monkeypatch):
+    monkeypatch.setattr(cache, "disco", None)
+    cache.calculos.limpar()
+    cliente = TestClient(index.app)
+    primeira = cliente.get("/calcular", params=consulta_get())
+    assert primeira.status_code == 200
+    assert primeira.headers["cache-control"] == index.CACHE_CONTROL_CALCULAR
+    assert primeira.headers["vary"] == "Accept"
+
+    consultas = (cache.calculos.acertos, cache.calculos.falhas)
+    segunda = cliente.get(
+        "/calcular", params=consulta_get(), headers={"If-None-Match": primeira.headers["etag"]}
+    )
+    assert segunda.status_code == 304
+    assert segunda.content == b""
+    assert segunda.headers["etag"] == primeira.headers["etag"]
+    assert segunda.headers["cache-control"] == index.CACHE_CONTROL_CALCULAR
+    assert segunda.headers["vary"] == "Accept"
+    # Nem o cache foi consultado: o cálculo foi pulado
+    assert (cache.calculos.acertos, cache.calculos.falhas) == consultas
+
+def test_etag_muda_com_accept_e_versao_do_motor(monkeypatch):
+    monkeypatch.setattr(cache, "disco", None)
+    cliente = TestClient(index.app)
+    em_json = cliente.get("/calcular", params=consulta_get())
+    msgpack = cliente.get("/calcular", params=consulta_get(), headers={"Accept": "application/msgpack"})
+    assert msgpack.status_code == 200
+    assert msgpack.headers["etag"] != em_json.headers["etag"]
+
+    monkeypatch.setattr(index.motor, "VERSAO", index.motor.VERSAO + "-teste")
+    nova_versao = cliente.get("/calcular", params=consulta_get(), headers={"If-None-Match": em_json.headers["etag"]})
+    assert nova_versao.status_code == 200
+    assert nova_versao.headers["etag"] != em_json.headers["etag"]
+
+def test_banco_travado_vira_falha_sem_esperar(tmp_path):
+    caminho = str(tmp_path / "cache.sqlite")
+    disco = cache.CacheSQLite(caminho)
+    calculado = index.calcular_aposentadoria_arrays(**PARAMETROS)
+    disco.guardar(cache.chave("calcular", PARAMETROS), calculado)
+
+    # Outro processo segurando a trava de escrita
+    outro = sqlite3.connect(caminho, isolation_level=None)
+    outro.execute("BEGIN IMMEDIATE")
+    try:
+        inicio = time.perf_counter()
+        disco.guardar(cache.chave("calcular", {**PARAMETROS, "anos": 30}), calculado)
+        assert time.perf_counter() - inicio < 0.5
+        assert disco.erros == 1
+    finally:
+        outro.execute("ROLLBACK")
+        outro.close()
+
+def resultado(valor: float, pontos: int = 10) -> dict:
+    return {"valor_final": valor, "saldo_acumulado": np.full(pontos, valor)}
+
+def test_lru_remove_a_entrada_menos_usada():
+    memoria = cache.CacheResultados(max_entradas=2)
+    memoria.guardar("a", resultado(1.0))
+    memoria.guardar("b", resultado(2.0))
+    # Consultar "a" a torna a mais recente; "b" sai quando "c" entra
+    assert memoria.obter("a")["valor_final"] == 1.0
+    memoria.guardar("c", resultado(3.0))
+
+    assert memoria.obter("b") is None
+    assert memoria.obter("a")["valor_final"] == 1.0
+    assert memoria.obter("c")["valor_final"] == 3.0
+    estatisticas = memoria.estatisticas()
+    assert (estatisticas["entradas"], estatisticas["remocoes"]) == (2, 1)
+    assert (estatisticas["acertos"], estatisticas["falhas"]) == (3, 1)
+    assert estatisticas["taxa_acerto"] == 0.75
+
+def test_limite_de_bytes():
+    tamanho = cache.tamanho_resultado(resultado(1.0, pontos=1000))
+    memoria = cache.CacheResultados(max_bytes=2 * tamanho + 1)
+    for chave in "abc":
+        memoria.guardar(chave, resultado(1.0, pontos=1000))
+
+    assert memoria.bytes == 2 * tamanho
+    assert memoria.obter("a") is None
+    assert memoria.estatisticas()["remocoes"] == 1
+    # Um resultado maior que o limite inteiro nem entra
+    memoria.guardar("enorme", resultado(1.0, pontos=100_000))
+    assert memoria.obter("enorme") is None
+    assert memoria.bytes == 2 * tamanho
+
+def test_ttl_expira_entradas(monkeypatch):
+    agora = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: agora[0])
+    memoria = cache.CacheResultados(ttl=60.0)
+    memoria.guardar("a", resultado(1.0))
+
+    agora[0] += 59.0
+    assert memoria.obter("a") is not None
+    agora[0] += 2.0
+    assert memoria.obter("a") is None
+    estatisticas = memoria.estatisticas()
+    assert (estatisticas["expiracoes"], estatisticas["entradas"], estatisticas["bytes"]) == (1, 0, 0)
+
+def test_resultado_devolvido_nao_altera_o_cache():
+    memoria = cache.CacheResultados()
+    memoria.guardar("a", resultado(1.0))
+
+    copia = memoria.obter("a")
+    copia.pop("saldo_acumulado")
+    copia["valor_final"] = 2.0
+    with pytest.raises(ValueError):
+        memoria.obter("a")["saldo_acumulado"][0] = 5.0
+
+    intacto = memoria.obter("a")
+    assert intacto["valor_final"] == 1.0
+    assert np.array_equal(intacto["saldo_acumulado"], np.full(10, 1.0))
+
+def test_cache_desativado():
+    memoria = cache.CacheResultados(max_entradas=0)
+    memoria.guardar("a", resultado(1.0))
+    assert not memoria.ativo
+    assert memoria.obter("a") is None
@@ -0,0 +1,44 @@
+import numpy as np
+
+import metas
+import motor
+
+def test_taxa_necessaria_recupera_a_taxa():
+    gerador = np.random.default_rng(0)
+    taxas = gerador.uniform(0.001, 0.9, 20000)
+    anos = gerador.integers(1, 51, 20000)
+    aportes = gerador.uniform(1, 20000, 20000)
+    taxa_mensal = (1 + taxas) ** (1/12) - 1
+    alvos = aportes * motor.fatores_acumulacao(taxa_mensal, anos * 12)
+
+    encontradas = metas.taxa_necessaria(alvos, aportes, anos)
+    assert np.max(np.abs(encontradas - taxas)) < 1e-12
+
+def test_taxa_necessaria_casos_limite():
+    # Os aportes sem rendimento já bastam: taxa 0
+    assert metas.taxa_necessaria(1000.0, 100.0, 1) == 0.0
+    # Nem a taxa máxima atinge o alvo: NaN
+    assert np.isnan(metas.taxa_necessaria(1e12, 100.0, 1))
+    assert np.isnan(metas.taxa_necessaria(1000.0, 0.0, 10))
+
+def test_anos_necessarios_e_o_menor_horizonte():
+    gerador = np.random.default_rng(1)
+    alvos = gerador.uniform(1e4, 1e7, 2000)
+    aportes = gerador.uniform(100, 20000, 2000)
+    taxas = gerador.uniform(0.01, 0.20, 2000)
+
+    anos = metas.anos_necessarios(alvos, aportes, taxas)
+    for alvo, aporte, taxa, ano in zip(alvos, aportes, taxas, anos):
+        assert motor.valor_final(aporte, int(ano), taxa) >= alvo * (1 - 1e-12)
+        if ano > 1:
+            assert motor.valor_final(aporte, int(ano) - 1, taxa) < alvo
+
+def test_anos_necessarios_casos_limite():
+    # Sem aporte a meta positiva é inatingível
+    assert np.isnan(metas.anos_necessarios(1e6, 0.0, 0.10))
+    # Meta já atingida: o horizonte mínimo é um ano
+    assert metas.anos_necessarios(0.0, 1000.0, 0.10) == 1
+
+def test_aporte_necessario_inverte_valor_final():
+    aporte = metas.aporte_necessario(1e6, 25, 0.08)
+    assert abs(motor.valor_final(float(aporte), 25, 0.08) - 1e6) < 1e-6
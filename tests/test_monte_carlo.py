@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+import monte_carlo
+
+def caminhos_completos(aporte_mensal, anos, taxa_retorno, volatilidade, caminhos, semente):
+    """Todos os saldos simulados, com os mesmos fluxos aleatórios de monte_carlo.simular"""
+    media_mensal, desvio_mensal = monte_carlo.parametros_lognormais(taxa_retorno, volatilidade)
+    return np.concatenate([
+        monte_carlo.saldos_caminhos(
+            np.random.default_rng(semente_bloco).normal(media_mensal, desvio_mensal, size=(tamanho, anos * 12)),
+            aporte_mensal
+        )
+        for semente_bloco, tamanho in monte_carlo.sementes_blocos(semente, caminhos)
+    ])
+
+@pytest.mark.parametrize("anos, volatilidade", [(25, 0.15), (50, 0.60), (5, 0.01)])
+def test_percentis_do_histograma_iguais_aos_exatos(anos, volatilidade):
+    resultado = monte_carlo.simular(2000.0, anos, 0.10, volatilidade, 5000, semente=7)
+    saldos = caminhos_completos(2000.0, anos, 0.10, volatilidade, 5000, semente=7)
+
+    for percentil in monte_carlo.PERCENTIS:
+        exato = np.percentile(saldos, percentil, axis=0)
+        aproximado = resultado["percentis"][f"p{percentil}"][1:]
+        assert np.max(np.abs(aproximado / exato - 1)) < 0.02
+
+@pytest.mark.parametrize("processos, threads", [(1, 2), (2, 1), (3, 2)])
+def test_paralelo_identico_ao_sequencial(processos, threads):
+    argumentos = dict(aporte_mensal=2000.0, anos=10, taxa_retorno=0.10, volatilidade=0.20,
+                      caminhos=3000, semente=11, tamanho_bloco=512)
+    sequencial = monte_carlo.simular(**argumentos)
+    paralelo = monte_carlo.simular_paralelo(**argumentos, processos=processos, threads=threads)
+
+    for nome, serie in sequencial["percentis"].items():
+        assert np.array_equal(paralelo["percentis"][nome], serie)
+    for campo in ("valor_final", "valor_final_medio", "probabilidade_sucesso", "caminhos"):
+        assert paralelo[campo] == sequencial[campo]
@@ -0,0 +1,63 @@
+import itertools
+
+import pytest
+
+import motor
+
+APORTES = (0.0, 1.0, 2000.0, 1_000_000.0)
+ANOS = (1, 2, 10, 25, 50)
+TAXAS = (0.01, 0.0537, 0.10, 0.20)
+
+def laco_original(aporte_mensal, anos, taxa_retorno):
+    """O laço mês a mês que o motor substituiu, como referência"""
+    taxa_mensal = (1 + taxa_retorno) ** (1/12) - 1
+    saldo_acumulado = [0]
+    aportes_totais = [0]
+    for mes in range(1, anos * 12 + 1):
+        saldo_acumulado.append(saldo_acumulado[-1] * (1 + taxa_mensal) + aporte_mensal)
+        aportes_totais.append(aporte_mensal * mes)
+    return saldo_acumulado, aportes_totais
+
+@pytest.mark.parametrize("aporte_mensal, anos, taxa_retorno", list(itertools.product(APORTES, ANOS, TAXAS)))
+def test_forma_fechada_igual_ao_laco(aporte_mensal, anos, taxa_retorno):
+    saldo_esperado, aportes_esperados = laco_original(aporte_mensal, anos, taxa_retorno)
+
+    resultados = motor.calcular_aposentadoria(aporte_mensal, anos, taxa_retorno, 0.04)
+    assert abs(resultados["valor_final"] - saldo_esperado[-1]) <= 0.01
+    assert abs(resultados["total_investido"] - aportes_esperados[-1]) <= 0.01
+
+    saldo_acumulado, aportes_totais = motor.serie_acumulacao(aporte_mensal, anos, taxa_retorno)
+    assert len(saldo_acumulado) == len(saldo_esperado)
+    assert max(abs(saldo_acumulado - saldo_esperado)) <= 0.01
+    assert max(abs(aportes_totais - aportes_esperados)) <= 0.01
+
+@pytest.mark.parametrize("anos", ANOS)
+def test_valor_final_igual_ao_fim_da_serie(anos):
+    saldo_acumulado, _ = motor.serie_acumulacao(2000.0, anos, 0.10)
+    assert abs(motor.valor_final(2000.0, anos, 0.10) - saldo_acumulado[-1]) <= 0.01
+
+def laco_crescente(aporte_mensal, anos, taxa_retorno, crescimento_aporte):
+    """Laço mês a mês com o aporte reajustado a cada 12 meses"""
+    taxa_mensal = (1 + taxa_retorno) ** (1/12) - 1
+    saldo_acumulado = [0.0]
+    for mes in range(1, anos * 12 + 1):
+        aporte = aporte_mensal * (1 + crescimento_aporte) ** ((mes - 1) // 12)
+        saldo_acumulado.append(saldo_acumulado[-1] * (1 + taxa_mensal) + aporte)
+    return saldo_acumulado
+
+@pytest.mark.parametrize("aporte_mensal, anos, taxa_retorno, crescimento_aporte", [
+    (2000.0, 25, 0.10, 0.03),
+    (2000.0, 50, 0.05, 0.20),
+    # Crescimento igual (ou quase igual) ao retorno: R e C praticamente coincidem
+    (2000.0, 25, 0.0537, 0.0537),
+    (1_000_000.0, 50, 0.0537, 0.0537),
+    (1_000_000.0, 50, 0.10, 0.10),
+    (1_000_000.0, 50, 0.10, 0.10 + 1e-12),
+])
+def test_aporte_crescente_igual_ao_laco(aporte_mensal, anos, taxa_retorno, crescimento_aporte):
+    saldo_esperado = laco_crescente(aporte_mensal, anos, taxa_retorno, crescimento_aporte)
+
+    saldo_acumulado, _ = motor.serie_acumulacao(aporte_mensal, anos, taxa_retorno, crescimento_aporte)
+    assert max(abs(saldo_acumulado - saldo_esperado)) <= 0.01
+    valor = motor.valor_final(aporte_mensal, anos, taxa_retorno, crescimento_aporte)
+    assert abs(valor - saldo_esperado[-1]) <= 0.01
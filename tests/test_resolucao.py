@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+import motor
+import resolucao
+
+def lttb_referencia(y, pontos):
+    """LTTB direto da definição, balde a balde com NumPy"""
+    tamanho = len(y)
+    limites = np.floor(np.linspace(1, tamanho - 1, pontos - 1)).astype(np.int64)
+    x = np.arange(tamanho, dtype=np.float64)
+    escolhidos = [0]
+    for balde in range(pontos - 2):
+        inicio, fim = limites[balde], limites[balde + 1]
+        if balde + 2 < len(limites):
+            seguinte = slice(limites[balde + 1], limites[balde + 2])
+            media_x, media_y = x[seguinte].mean(), y[seguinte].mean()
+        else:
+            media_x, media_y = x[-1], y[-1]
+        anterior = escolhidos[-1]
+        areas = np.abs(
+            (x[anterior] - media_x) * (y[inicio:fim] - y[anterior])
+            - (x[anterior] - x[inicio:fim]) * (media_y - y[anterior])
+        )
+        escolhidos.append(inicio + int(np.argmax(areas)))
+    return escolhidos + [tamanho - 1]
+
+SERIES = {
+    "saldo": motor.serie_acumulacao(2000.0, 50, 0.10)[0],
+    "passeio": np.random.default_rng(0).normal(size=601).cumsum(),
+    "constante": np.zeros(601),
+}
+
+@pytest.mark.parametrize("serie", SERIES)
+@pytest.mark.parametrize("tamanho, pontos", [(601, 100), (301, 100), (601, 3), (13, 5), (121, 120)])
+def test_lttb_igual_a_referencia(serie, tamanho, pontos):
+    y = SERIES[serie][:tamanho]
+    assert resolucao.indices_lttb(y, pontos).tolist() == lttb_referencia(y, pontos)
+
+def test_lttb_sem_reducao():
+    assert resolucao.indices_lttb(np.arange(10.0), 10).tolist() == list(range(10))
+    assert resolucao.indices_lttb(np.arange(10.0), 2).tolist() == [0, 9]
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+import retirada
+
+def passo_a_passo(saldo_inicial, saque_inicial, taxa_retorno, inflacao, anos):
+    taxas_mensais = np.full((1, anos * 12), (1 + taxa_retorno) ** (1/12) - 1)
+    saldos, saques, esgotamento = retirada.simular_retirada_passos(saldo_inicial, saque_inicial, taxas_mensais, inflacao)
+    return saldos[0], saques[0], float(esgotamento[0])
+
+@pytest.mark.parametrize("saldo_inicial, saque_inicial, taxa_retorno, inflacao", [
+    (1_000_000.0, 4000.0, 0.08, 0.04),
+    (1_000_000.0, 10000.0, 0.06, 0.04),
+    # Retorno igual à inflação (i == g)
+    (1_000_000.0, 5000.0, 0.05, 0.05),
+    (1_000_000.0, 3000.0, 0.05, 0.05),
+    # Quase iguais: sem cuidado, a diferença de potências cancela
+    (1_000_000.0, 5000.0, 0.05, 0.05 + 1e-13),
+    (1_000_000.0, 5000.0, 0.05, 0.05 + 1e-9),
+    # Retorno abaixo da inflação
+    (2_000_000.0, 8000.0, 0.03, 0.06),
+    # Saques perpétuos: o rendimento cobre o saque corrigido
+    (1_000_000.0, 2000.0, 0.10, 0.03),
+    (500_000.0, 0.0, 0.05, 0.05),
+])
+def test_forma_fechada_igual_ao_passo_a_passo(saldo_inicial, saque_inicial, taxa_retorno, inflacao):
+    saldos, saques, esgotamento = retirada.serie_retirada(saldo_inicial, saque_inicial, taxa_retorno, inflacao, 50)
+    saldos_passos, saques_passos, esgotamento_passos = passo_a_passo(
+        saldo_inicial, saque_inicial, taxa_retorno, inflacao, 50
+    )
+
+    assert esgotamento == esgotamento_passos
+    np.testing.assert_allclose(saldos, np.maximum(saldos_passos, 0), rtol=1e-7, atol=1e-6)
+    np.testing.assert_allclose(saques, saques_passos, rtol=1e-7, atol=1e-6)
+
+def test_mes_esgotamento_vetorizado():
+    gerador = np.random.default_rng(2)
+    inflacao = 0.04
+    saldos = gerador.uniform(1e5, 2e6, 500)
+    saques = gerador.uniform(500, 20000, 500)
+    # Um quinto dos cenários com retorno igual à inflação
+    taxas = np.where(gerador.random(500) < 0.2, inflacao, gerador.uniform(0.01, 0.15, 500))
+    taxas_mensais = (1 + taxas) ** (1/12) - 1
+
+    esgotamento = retirada.mes_esgotamento(saldos, saques, taxas_mensais, (1 + inflacao) ** (1/12) - 1)
+    _, _, esgotamento_passos = retirada.simular_retirada_passos(
+        saldos, saques, np.repeat(taxas_mensais[:, None], 1200, axis=1), inflacao
+    )
+    dentro = np.isfinite(esgotamento_passos)
+    assert dentro.any() and not dentro.all()
+    assert np.array_equal(esgotamento[dentro], esgotamento_passos[dentro])
+    assert np.all(esgotamento[~dentro] > 1200)